@@ -42,14 +42,15 @@ class App:
         
     def playout(self):
         Thread(target=self.on_execute, daemon=True).start()
-        alpha = AlphaBeta(self.game_state.game)
+        alpha = AlphaBeta(self.game_state.game, depth=None, timeLimit=1)
+        searchers = { player: mcts.MCTSSearcher() for player in [Player.P1, Player.P2] }
         while not self.game_state.finished and self._running:
             agent = self.currentAgent()
             if agent == "USER":
                 sleep(1/60)
                 continue
             if agent == "MCTS":
-                self.game_state = mcts.findNextMove(self.game_state).game_state
+                self.game_state = searchers[self.game_state.currentPlayer].findNextMove(self.game_state).game_state
             if agent == "MINMAX":
                 self.game_state = alpha.findBestMove(self.game_state)
         self.finished = True
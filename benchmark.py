@@ -0,0 +1,150 @@
+"""Throughput benchmarks of the game engine over breakthrough and a sample of generated games
+
+Run `python benchmark.py --output results.json` and compare the results between commits,
+numbers are only comparable between runs with the same settings on the same machine.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import utils
+from game_definitions.heuristicValueEvaluator import HeuristicCalculator
+from mcts.alphabeta import AlphaBeta
+
+try:
+    import resource
+except ImportError: #not available on Windows
+    resource = None
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games")
+
+def loadGames(gamesDir=GAMES_DIR, sample=20, seed=0):
+    """Breakthrough and a random sample of generated games, as a dict of game name to BoardGame"""
+    files = sorted(glob.glob(os.path.join(gamesDir, "generated", "*.yml")))
+    files = random.Random(seed).sample(files, min(sample, len(files)))
+    files = [os.path.join(gamesDir, "breakthrough.yml")] + sorted(files)
+    return { os.path.relpath(path, gamesDir): utils.fromFile(path) for path in files }
+
+def benchPlayouts(game, playouts, engine="array"):
+    """Plays random playouts from the initial state, returns (playouts/sec, states/sec, sampled positions)
+
+    Positions reached by the playouts are returned as (board, player) pairs for the other benchmarks.
+    """
+    game.engine = engine
+    positions = []
+    states = 0
+    elapsed = 0
+    for _ in range(playouts):
+        game_state = game.initialState()
+        moves = []
+        started = time.perf_counter()
+        while not game_state.finished:
+            move = random.choice(game_state.possibleMoves)
+            game_state.make(move)
+            moves.append(move)
+        elapsed += time.perf_counter() - started
+        states += len(moves)
+        positions += replayPositions(game, moves)
+    return playouts / elapsed, states / elapsed, positions
+
+def replayPositions(game, moves):
+    """Positions before every move of a playout, replayed after it so copying boards is not timed"""
+    positions = []
+    game_state = game.initialState()
+    for move in moves:
+        positions.append((game_state.board.__copy__(), game_state.currentPlayer))
+        game_state.make(move)
+    return positions
+
+def benchMoveGeneration(game, positions):
+    """Microseconds per generation of all legal moves of a position, without any moves cached"""
+    stateClass = type(game.initialState())
+    states = [stateClass(game, board, player) for board, player in positions]
+    started = time.perf_counter()
+    for game_state in states:
+        game_state.possibleMoves
+    return (time.perf_counter() - started) / max(len(states), 1) * 1e6, states
+
+def benchHeuristic(game, states):
+    """Microseconds per HeuristicCalculator.calculate of a position whose legal moves are already generated"""
+    calculator = HeuristicCalculator(game)
+    started = time.perf_counter()
+    for game_state in states:
+        calculator.calculate(game_state)
+    return (time.perf_counter() - started) / max(len(states), 1) * 1e6
+
+def benchAlphaBeta(game, depth):
+    """Positions per second visited by AlphaBeta searching the initial state to given depth"""
+    search = AlphaBeta(game, depth=depth)
+    started = time.perf_counter()
+    search.findBestMove(game.initialState())
+    return search.nodes / (time.perf_counter() - started)
+
+def peakRSS():
+    """Peak resident set size of the process in bytes, None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def runBenchmarks(gamesDir=GAMES_DIR, sample=20, seed=0, playouts=5, depth=2, engine="array"):
+    """Runs all benchmarks on every game, returns results as a JSON serializable dict
+
+    Totals are weighted by the work done in each game, so games with longer playouts count more.
+    """
+    games = loadGames(gamesDir, sample, seed)
+    results = {}
+    for name, game in games.items():
+        random.seed(seed)
+        playoutsPerSecond, statesPerSecond, positions = benchPlayouts(game, playouts, engine)
+        moveGeneration, states = benchMoveGeneration(game, positions)
+        results[name] = {
+            "positions": len(positions),
+            "playouts_per_sec": playoutsPerSecond,
+            "states_per_sec": statesPerSecond,
+            "movegen_us": moveGeneration,
+            "heuristic_us": benchHeuristic(game, states),
+            "alphabeta_nodes_per_sec": benchAlphaBeta(game, depth),
+        }
+    totalPositions = sum(result["positions"] for result in results.values())
+    totals = { "playouts_per_sec": len(results) * playouts / sum(playouts / result["playouts_per_sec"] for result in results.values()) }
+    totals["states_per_sec"] = totalPositions / sum(result["positions"] / result["states_per_sec"] for result in results.values())
+    for key in ["movegen_us", "heuristic_us"]:
+        totals[key] = sum(result[key] * result["positions"] for result in results.values()) / max(totalPositions, 1)
+    totals["alphabeta_nodes_per_sec"] = sum(result["alphabeta_nodes_per_sec"] for result in results.values()) / len(results)
+    totals["peak_rss_bytes"] = peakRSS()
+    return {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "settings": { "sample": sample, "seed": seed, "playouts": playouts, "depth": depth, "engine": engine },
+        "totals": totals,
+        "games": results,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measures engine throughput over breakthrough and a sample of generated games")
+    parser.add_argument("--games-dir", default=GAMES_DIR)
+    parser.add_argument("--sample", type=int, default=20, help="number of generated games")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--playouts", type=int, default=5, help="random playouts per game")
+    parser.add_argument("--depth", type=int, default=2, help="AlphaBeta search depth")
+    parser.add_argument("--engine", choices=["array", "bitboard"], default="array")
+    parser.add_argument("--output", help="JSON file to write results of all games to, only totals are printed")
+    args = parser.parse_args()
+    results = runBenchmarks(args.games_dir, args.sample, args.seed, args.playouts, args.depth, args.engine)
+    if args.output:
+        with open(args.output, "w") as resultsFile:
+            json.dump(results, resultsFile, indent=2)
+    print(json.dumps(results["totals"], indent=2))
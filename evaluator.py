@@ -1,3 +1,8 @@
+from collections import deque
+from game_elements.player import Player
+from game_definitions.moves import Hop, Leap, Slide
+from game_definitions.vector import Vector
+from game_definitions.win_conditions import And, Or, PieceIsPlacedAt, EnemyPieceTypeRemoved, EnemyTotalPiecesLeft
 
 
 def pieceTraverse(moveset, startingPosition, board):
@@ -13,4 +18,102 @@ def pieceTraverse(moveset, startingPosition, board):
                 continue
             queue.append(destination)
     return visited
-    
\ No newline at end of file
+
+def pieceDistances(moveset, targetSquares, board):
+    """Least number of moves of a piece with given moveset from every square (by index) to the closest target square, ignoring other pieces
+
+    Hops reach one step in their direction, leaps two steps and slides any number of steps. Squares from which
+    no target can be reached have distance None.
+    """
+    reaches = []
+    for move in moveset:
+        if type(move) == Slide:
+            reaches += [move.direction * step for step in range(1, max(board.width, board.height))]
+        elif type(move) == Leap:
+            reaches.append(move.direction * 2)
+        else:
+            reaches.append(move.direction)
+    distances = [None] * (board.width * board.height)
+    queue = deque()
+    for x, y in targetSquares:
+        if board.contains((x, y)) and distances[board.index((x, y))] is None:
+            distances[board.index((x, y))] = 0
+            queue.append(Vector(x, y))
+    while queue:
+        currentSquare = queue.popleft()
+        distance = distances[board.index(currentSquare)] + 1
+        for reach in reaches:
+            origin = Vector(currentSquare.x - reach.x, currentSquare.y - reach.y)
+            if board.contains(origin) and distances[board.index(origin)] is None:
+                distances[board.index(origin)] = distance
+                queue.append(origin)
+    return distances
+
+def canCapture(piece):
+    """Whether any move of the piece can capture, i.e. it is an attacking hop, a slide or a leap"""
+    return any(type(move) != Hop or move.can_attack for move in piece.moveset)
+
+def canEverMove(piece, width, height):
+    """Whether any move of the piece stays on a board with given dimensions from at least one of its squares"""
+    return any(target for move in piece.moveset for target in move.compile(width, height))
+
+def conditionAchievable(game, condition):
+    """Whether the win condition can be met at all, judged from moves of the pieces ignoring other pieces, see 'rejectionReasons'"""
+    conditionType = type(condition)
+    if conditionType == And:
+        return conditionAchievable(game, condition.conditionA) and conditionAchievable(game, condition.conditionB)
+    if conditionType == Or:
+        return conditionAchievable(game, condition.conditionA) or conditionAchievable(game, condition.conditionB)
+    board = game.initialBoard
+    player = condition.player
+    pieces = game.piece_types[player]
+    if conditionType == PieceIsPlacedAt:
+        for pieceId in set(board.pieces[index] for index in board.locations[player.value]):
+            distances = pieceDistances(pieces[pieceId].moveset, condition.target_squares, board)
+            if any(distances[index] is not None for index in board.locations[player.value] if board.pieces[index] == pieceId):
+                return True
+        return False
+    if conditionType in [EnemyPieceTypeRemoved, EnemyTotalPiecesLeft]:
+        if condition.check(board):
+            return True
+        return any(canCapture(pieces[board.pieces[index]]) for index in board.locations[player.value])
+    return True
+
+def canWin(game, player):
+    """Whether the player can ever win, i.e. its win condition can be met or it can capture all enemy pieces, see 'conditionAchievable'"""
+    board = game.initialBoard
+    return conditionAchievable(game, game.winConditions[player]) or any(canCapture(game.piece_types[player][board.pieces[index]]) for index in board.locations[player.value])
+
+def rejectionReasons(game, oneSided=False):
+    """Reasons why the game cannot pass game_generator.testGame, found without playing it, empty list if there are none
+
+    A game is rejected when one of its piece types has no moves, never leaves its squares or is not placed on the board
+    (testGame needs every piece type to move), when the first player cannot move, when a win condition is already met by the initial placement
+    (the game would end within a few turns), or when neither player can ever win: its win condition can never be met
+    (targets of PieceIsPlacedAt are unreachable by moves of its pieces, see 'pieceDistances', or it has no capturing move
+    to remove enemy pieces) and it cannot capture all enemy pieces either.
+    With oneSided games that only one of the players can win are rejected as well, although some of them could pass testGame.
+    """
+    reasons = []
+    board = game.initialBoard
+    placed = set(board.pieces[index] for index in board.locations[Player.P1.value])
+    for pieceId, piece in enumerate(game.piece_types[Player.P1]):
+        if piece is None:
+            continue
+        if not piece.moveset:
+            reasons.append("piece type %d has no moves" % pieceId)
+        elif not canEverMove(piece, board.width, board.height):
+            reasons.append("moves of piece type %d never stay on the board" % pieceId)
+        if pieceId not in placed:
+            reasons.append("piece type %d is not placed on the board" % pieceId)
+    if not game.initialState().possibleMoves:
+        reasons.append("P1 has no legal move at the start")
+    for player in [Player.P1, Player.P2]:
+        if game.winConditions[player].check(board):
+            reasons.append("win condition of %s is met by the initial placement" % player.name)
+    losers = [player for player in [Player.P1, Player.P2] if not canWin(game, player)]
+    if len(losers) == 2:
+        reasons.append("neither player can meet its win condition nor capture enemy pieces")
+    elif oneSided:
+        reasons += ["%s can neither meet its win condition nor capture enemy pieces" % player.name for player in losers]
+    return reasons
@@ -0,0 +1,253 @@
+"""Evolution of board games, genomes are game definitions in the form of BoardGame.toDict"""
+import copy
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from game_definitions.boardGame import BoardGame
+from game_definitions import moves as moveDefinitions
+from game_elements.piece import Piece
+from game_elements.player import Player
+from generators import moveGenerator, boardGenerator
+from generators.winConditionGenerator import WinConditionGenerator
+import game_generator
+
+@contextmanager
+def seededRandom(seed):
+    """Seeds the random module, used by the operators and generators, restoring its previous state on exit
+
+    Callers keep their own random sequence, while the evolution stays reproducible from its seed alone.
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+def decode(gameDict):
+    return BoardGame.fromDict(gameDict)
+
+def removedPieceIds(conditionDict):
+    """Piece ids named by EnemyPieceTypeRemoved conditions of the win condition"""
+    (kind, value), = conditionDict.items()
+    if kind in ["and", "or"]:
+        return set().union(*[removedPieceIds(operand) for operand in value])
+    return {value} if kind == "EnemyPieceTypeRemoved" else set()
+
+def isValid(gameDict):
+    """Whether the genome describes a game that can be played, i.e. it can be built, its win condition names existing pieces
+    and player 1 has a move at the start"""
+    try:
+        game = decode(gameDict)
+        if not removedPieceIds(gameDict["winConditions"]) <= set(range(1, len(gameDict["pieces"]) + 1)):
+            return False
+        return len(game.initialState().possibleMoves) > 0
+    except Exception:
+        return False
+
+def mutateMoves(gameDict):
+    """Adds, removes or replaces a move of a random piece, keeping destinations of its moves apart like moveGenerator.generateMoveSet"""
+    definition, = random.choice(gameDict["pieces"]).values()
+    moves = definition["moves"]
+    change = random.random()
+    if len(moves) > 1 and change < 1 / 3:
+        moves.pop(random.randrange(len(moves)))
+        return
+    replaced = None if change < 2 / 3 else random.randrange(len(moves))
+    takenDestinations = set()
+    for i, moveDict in enumerate(moves):
+        if i != replaced:
+            takenDestinations |= moveGenerator.moveDestinations(moveDefinitions.fromDict(moveDict))
+    move = moveGenerator.generateMove(takenDestinations)
+    if move is None:
+        return
+    if replaced is None:
+        moves.append(move.toDict())
+    else:
+        moves[replaced] = move.toDict()
+
+def mutatePiece(gameDict):
+    """Replaces moveset of a random piece with a newly generated one"""
+    pieceDict = random.choice(gameDict["pieces"])
+    (pieceId, _), = pieceDict.items()
+    pieceDict[pieceId] = Piece(pieceId, moveGenerator.generateMoveSet()).toDict()[str(pieceId)]
+
+def mutatePlacement(gameDict):
+    """Generates new initial placement of the pieces on the board of the same size"""
+    game = decode(gameDict)
+    width, height = game.initialBoard.width, game.initialBoard.height
+    board, player2mirrored = boardGenerator.BoardGenerator(width, height, len(gameDict["pieces"])).generateBoard(symmetric=random.choice([True, False]))
+    newGame = BoardGame(board, player2mirrored, game.piece_types[Player.P1], game.winConditions[Player.P1])
+    gameDict["placement"] = newGame.toDict()["placement"]
+    gameDict["player2mirrored"] = player2mirrored
+
+def mutateWinCondition(gameDict):
+    """Generates new win condition for the board of the game"""
+    board = decode(gameDict).initialBoard
+    gameDict["winConditions"] = WinConditionGenerator(board, random.choice([True, False]), len(gameDict["pieces"])).generateCondition().toDict()
+
+MUTATIONS = [mutateMoves, mutatePiece, mutatePlacement, mutateWinCondition]
+
+def mutate(gameDict, attempts=10):
+    """Copy of the genome changed by a random mutation, the genome itself when no valid mutation was found"""
+    for _ in range(attempts):
+        child = copy.deepcopy(gameDict)
+        try:
+            random.choice(MUTATIONS)(child)
+        except Exception: #generators fail on some boards, see game_generator.generateGame
+            continue
+        if child != gameDict and isValid(child):
+            return child
+    return gameDict
+
+def crossover(gameDictA, gameDictB):
+    """Genome with board and placement of the first parent and movesets of pieces and win condition taken from either parent
+
+    Win condition of the second parent is used only with a board of the same size, as it can refer to its squares.
+    """
+    child = copy.deepcopy(gameDictA)
+    movesetsB = [next(iter(pieceDict.values())) for pieceDict in gameDictB["pieces"]]
+    for pieceDict, definitionB in zip(child["pieces"], movesetsB):
+        if random.random() < 0.5:
+            (pieceId, _), = pieceDict.items()
+            pieceDict[pieceId] = copy.deepcopy(definitionB)
+    if gameDictA["dimensions"] == gameDictB["dimensions"] and random.random() < 0.5:
+        child["winConditions"] = copy.deepcopy(gameDictB["winConditions"])
+    return child if isValid(child) else copy.deepcopy(gameDictA)
+
+def fitness(winners, turnCounts, movedPieceTypes, pieceTypes):
+    """Fitness of a game from outcomes of its playouts, in [0, 1]
+
+    Product of the share of playouts with a winner, balance of wins between the players, share of piece types that moved
+    and a length score that is 0 for games shorter than 10 turns (like in game_generator.testGame), grows to 1 at 40 turns
+    and falls off above 200 turns.
+    """
+    decisive = [winner for winner in winners if winner is not None]
+    if not decisive:
+        return 0.0
+    balance = 1 - abs(decisive.count(Player.P1) - decisive.count(Player.P2)) / len(decisive)
+    length = statistics.median(turnCounts)
+    lengthScore = 0.0 if length < 10 else min(1.0, (length - 10) / 30, 200 / length)
+    return (len(decisive) / len(winners)) * balance * lengthScore * (len(movedPieceTypes) / pieceTypes)
+
+def evaluate(gameDict, playouts, seed):
+    """Fitness of the genome from given number of playouts, run in worker processes"""
+    game = decode(gameDict)
+    winners, turnCounts, moved = [], [], set()
+    with seededRandom(seed):
+        for winner, turnCount, movedPieces in game_generator.playoutResults(game, playouts):
+            winners.append(winner)
+            turnCounts.append(turnCount)
+            moved |= movedPieces
+    return fitness(winners, turnCounts, moved, len(gameDict["pieces"]))
+
+class Evolution:
+    """Generational evolution of games with elitism, tournament selection, crossover and mutation
+
+    Fitness (see 'fitness') of every new genome is evaluated from random playouts, by a pool of worker processes
+    when there is more than one worker. Fitness of genomes is remembered, so elites and repeated genomes are not evaluated again.
+
+    Attributes
+    ----------
+    populationSize : int
+        number of genomes in every generation
+    elite : int
+        number of best genomes copied unchanged to the next generation
+    crossoverRate : float
+        probability that a child is made by crossover of two parents, otherwise it is a mutated copy of a single parent
+    tournament : int
+        number of genomes competing for being a parent
+    playouts : int
+        number of playouts evaluating a genome
+    workers : int
+        number of processes evaluating fitness, None for one per CPU
+    population : List[Tuple[float, dict]]
+        (fitness, genome) pairs of the current generation, best first
+    history : List[dict]
+        statistics of all evaluated generations, see 'step'
+    """
+
+    def __init__(self, populationSize=50, elite=5, crossoverRate=0.5, tournament=3, playouts=20, workers=1, seed=None):
+        self.populationSize = populationSize
+        self.elite = elite
+        self.crossoverRate = crossoverRate
+        self.tournament = tournament
+        self.playouts = playouts
+        self.workers = workers or os.cpu_count()
+        self.random = random.Random(seed)
+        self.population = []
+        self.history = []
+        self.fitnessCache = {}
+
+    def initialPopulation(self):
+        population = []
+        with seededRandom(self.random.getrandbits(32)):
+            while len(population) < self.populationSize:
+                genome = game_generator.generateGame().toDict()
+                if isValid(genome):
+                    population.append(genome)
+        return population
+
+    def evaluateAll(self, genomes, executor=None):
+        """(fitness, genome) pairs of the genomes, returns them with number of genomes that had to be evaluated"""
+        keys = [json.dumps(genome, sort_keys=True) for genome in genomes]
+        missing = list({ key: genome for key, genome in zip(keys, genomes) if key not in self.fitnessCache }.items())
+        seeds = [self.random.getrandbits(32) for _ in missing]
+        arguments = ([genome for _, genome in missing], [self.playouts] * len(missing), seeds)
+        results = executor.map(evaluate, *arguments) if executor is not None else map(evaluate, *arguments)
+        for (key, _), value in zip(missing, results):
+            self.fitnessCache[key] = value
+        return [(self.fitnessCache[key], genome) for key, genome in zip(keys, genomes)], len(missing)
+
+    def select(self):
+        return max(self.random.sample(self.population, min(self.tournament, len(self.population))), key=lambda pair: pair[0])[1]
+
+    def offspring(self):
+        children = [genome for _, genome in self.population[:self.elite]]
+        with seededRandom(self.random.getrandbits(32)):
+            while len(children) < self.populationSize:
+                if self.random.random() < self.crossoverRate:
+                    child = crossover(self.select(), self.select())
+                else:
+                    child = self.select()
+                children.append(mutate(child))
+        return children
+
+    def step(self, executor=None):
+        """Evaluates the next generation and replaces the population with it, returns its statistics
+
+        Statistics hold the generation number, best and mean fitness, number of evaluations and evaluations per second.
+        """
+        genomes = self.offspring() if self.population else self.initialPopulation()
+        started = time.perf_counter()
+        evaluated, evaluations = self.evaluateAll(genomes, executor)
+        elapsed = time.perf_counter() - started
+        self.population = sorted(evaluated, key=lambda pair: pair[0], reverse=True)
+        fitnesses = [value for value, _ in self.population]
+        stats = {
+            "generation": len(self.history),
+            "best": fitnesses[0],
+            "mean": statistics.mean(fitnesses),
+            "evaluations": evaluations,
+            "evaluations_per_sec": evaluations / elapsed if elapsed > 0 else 0.0,
+        }
+        self.history.append(stats)
+        return stats
+
+    def run(self, generations, verbose=True):
+        """Runs given number of generations, returns the best (fitness, genome) pair"""
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for _ in range(generations):
+                stats = self.step(executor)
+                if verbose:
+                    print("generation %d: best %.3f, mean %.3f, %d evaluations, %.1f evaluations/s" %
+                          (stats["generation"], stats["best"], stats["mean"], stats["evaluations"], stats["evaluations_per_sec"]))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.population[0]
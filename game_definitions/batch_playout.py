@@ -0,0 +1,226 @@
+import random
+from game_elements.player import Player
+from game_elements.board import Board, OWNERS
+from game_definitions.boardGame import GameState
+from game_definitions.moves import Hop, Leap, Slide
+from game_definitions.move_conditions import MoveCondition, Not, At, Facing, Enemy, Ally, Empty
+from game_definitions.win_conditions import And, Or, PieceIsPlacedAt, EnemyPieceTypeRemoved, EnemyTotalPiecesLeft
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def available():
+    return np is not None
+
+class UnsupportedGame(Exception):
+    """Raised by BatchPlayout for games it cannot play, which have to be played on GameState objects instead"""
+
+class BatchPlayout:
+    """Runs many independent random playouts of the same game at once, using NumPy arrays
+
+    Every board of the batch is a row of 'codes' array, holding `owner * 256 + piece` for every square (0 for empty ones)
+    and one extra, always empty square used as a padding target. All moves that could ever be legal are precomputed
+    from move tables of the game (see Hop.compile, Slide.compile, Leap.compile) as candidates with origin, destination,
+    leaped over square and squares that have to be empty on the way. In each turn legality of all candidates is
+    evaluated for all boards with array lookups and masks, and every board plays one of its legal moves, chosen uniformly at random,
+    the same way 'game_generator.controlledPlayout' does. Cost of a turn barely depends on number of boards in the batch,
+    so once only a few of them are still being played they are finished one by one on regular GameState objects.
+
+    Raises UnsupportedGame for games using move or win conditions this engine cannot evaluate, or when NumPy is not available.
+    """
+
+    def __init__(self, game, handoff=4):
+        if np is None:
+            raise UnsupportedGame("NumPy is not available")
+        self.game = game
+        self.width = game.initialBoard.width
+        self.height = game.initialBoard.height
+        self.size = self.width * self.height
+        self.n_pieces = len(game.piece_types[Player.P1]) - 1
+        self.handoff = handoff
+        self.initialCodes = self.encode(game.initialBoard)
+        self.candidates = { player: self.prepareCandidates(player) for player in [Player.P1, Player.P2] }
+        self.winConditions = { player: self.prepareWinCondition(game.winConditions[player]) for player in [Player.P1, Player.P2] }
+
+    def encode(self, board):
+        """Row of 'codes' array describing given board"""
+        codes = np.zeros(self.size + 1, dtype=np.int16)
+        for index in range(self.size):
+            if board.pieces[index]:
+                codes[index] = board.owners[index] * 256 + board.pieces[index]
+        return codes
+
+    def decode(self, codes):
+        """Board described by a row of 'codes' array"""
+        board = Board(self.width, self.height)
+        board.game = self.game
+        for index in np.nonzero(codes[:self.size])[0].tolist():
+            board.place(board.position(index), int(codes[index]) & 255, OWNERS[int(codes[index]) >> 8])
+        return board
+
+    def prepareCandidates(self, player):
+        origins, destinations, leapedOver, paths, codes, allowEnemy = [], [], [], [], [], []
+        conditions, pieceRanges = [], []
+        sentinel = self.size
+        for pieceId, piece in enumerate(self.game.piece_types[player]):
+            if piece is None:
+                continue
+            pieceStart = len(origins)
+            code = player.value * 256 + pieceId
+            for move in piece.moveset:
+                start = len(origins)
+                table = move.table if move.tableSize == (self.width, self.height) else move.compile(self.width, self.height)
+                for origin in range(self.size):
+                    if type(move) == Hop:
+                        targets = [] if table[origin] is None else [(table[origin][0], sentinel, [], move.can_attack)]
+                    elif type(move) == Leap:
+                        targets = [] if table[origin] is None else [(table[origin][2], table[origin][0], [], False)]
+                    elif type(move) == Slide:
+                        ray = [index for index, _ in table[origin]]
+                        targets = [(index, sentinel, ray[:step], True) for step, index in enumerate(ray)]
+                    else:
+                        raise UnsupportedGame("Unsupported move " + type(move).__name__)
+                    for destination, over, path, attack in targets:
+                        origins.append(origin)
+                        destinations.append(destination)
+                        leapedOver.append(over)
+                        paths.append(path)
+                        codes.append(code)
+                        allowEnemy.append(attack)
+                if move.condition and len(origins) > start:
+                    conditions.append(self.prepareMoveCondition(move.condition, origins[start:], destinations[start:], start, player))
+            pieceRanges.append((pieceId, pieceStart, len(origins)))
+        pathLength = max([len(path) for path in paths] + [1])
+        paddedPaths = np.full((len(paths), pathLength), sentinel, dtype=np.intp)
+        for i, path in enumerate(paths):
+            paddedPaths[i, :len(path)] = path
+        return {
+            "origins": np.array(origins, dtype=np.intp),
+            "destinations": np.array(destinations, dtype=np.intp),
+            "leapedOver": np.array(leapedOver, dtype=np.intp),
+            "paths": paddedPaths,
+            "hasPaths": any(paths),
+            "codes": np.array(codes, dtype=np.int16),
+            "allowEnemy": np.array(allowEnemy, dtype=bool),
+            "pieceRanges": pieceRanges,
+            "conditions": conditions
+        }
+
+    def prepareMoveCondition(self, condition, origins, destinations, start, player):
+        negated = False
+        while type(condition) == Not:
+            negated = not negated
+            condition = condition.condition
+        if type(condition) != MoveCondition or type(condition.selector) not in [At, Facing] \
+                or type(condition.checker) not in [Enemy, Ally, Empty]:
+            raise UnsupportedGame("Unsupported move condition")
+        bases = destinations if condition.targetsDestination else origins
+        squares = [condition.selector.squares(self.width, self.height, (base % self.width, base // self.width)) for base in bases]
+        length = max([len(targets) for targets in squares] + [1])
+        targets = np.full((len(squares), length), self.size, dtype=np.intp)
+        for i, row in enumerate(squares):
+            targets[i, :len(row)] = [y * self.width + x for x, y in row]
+        checker = type(condition.checker)
+        expected = { Enemy: (~player).value, Ally: player.value, Empty: 0 }[checker]
+        return (start, start + len(bases), targets, expected, negated)
+
+    def prepareWinCondition(self, condition):
+        conditionType = type(condition)
+        if conditionType in [And, Or]:
+            checkA = self.prepareWinCondition(condition.conditionA)
+            checkB = self.prepareWinCondition(condition.conditionB)
+            if conditionType == And:
+                return lambda codes: checkA(codes) & checkB(codes)
+            return lambda codes: checkA(codes) | checkB(codes)
+        if conditionType == PieceIsPlacedAt:
+            targets = np.array([y * self.width + x for x, y in condition.target_squares], dtype=np.intp)
+            owner = condition.player.value
+            return lambda codes: ((codes[:, targets] >> 8) == owner).any(axis=1)
+        if conditionType == EnemyPieceTypeRemoved:
+            code = (~condition.player).value * 256 + condition.pieceId
+            return lambda codes: ~(codes == code).any(axis=1)
+        if conditionType == EnemyTotalPiecesLeft:
+            enemy = (~condition.player).value
+            return lambda codes: ((codes >> 8) == enemy).sum(axis=1) <= condition.totalLeft
+        raise UnsupportedGame("Unsupported win condition " + conditionType.__name__)
+
+    def legalMoves(self, codes, player):
+        """Boolean mask of legal candidates (columns) of given player for every board of the batch (rows)"""
+        candidates = self.candidates[player]
+        owners = codes >> 8
+        legal = codes[:, candidates["origins"]] == candidates["codes"]
+        destinationOwners = owners[:, candidates["destinations"]]
+        legal &= destinationOwners != player.value
+        legal &= candidates["allowEnemy"] | (destinationOwners == 0)
+        if candidates["hasPaths"]:
+            legal &= (codes[:, candidates["paths"]] == 0).all(axis=2)
+        for start, end, targets, expected, negated in candidates["conditions"]:
+            targetCodes = codes[:, targets]
+            first = (targetCodes != 0).argmax(axis=2)
+            targetOwners = np.take_along_axis(targetCodes, first[:, :, None], axis=2)[:, :, 0] >> 8
+            passed = targetOwners == expected
+            legal[:, start:end] &= ~passed if negated else passed
+        return legal
+
+    def winners(self, codes, player):
+        """Player.value of the winner for every board of the batch, 0 where there is no winner yet, see GameState.winner"""
+        winners = np.zeros(len(codes), dtype=np.int8)
+        winners[self.winConditions[~player](codes)] = (~player).value
+        winners[~((codes >> 8) == player.value).any(axis=1)] = (~player).value
+        return winners
+
+    def run(self, n, rng=None, maxRounds=500):
+        """Plays n random playouts, returns list of (winner, turn count, set of piece ids that could move) for each of them"""
+        rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        codes = np.tile(self.initialCodes, (n, 1))
+        ids = np.arange(n)
+        movedPieces = np.zeros((n, self.n_pieces + 1), dtype=bool)
+        results = [None] * n
+        player = Player.P1
+        turn = 0
+        while len(ids):
+            legal = self.legalMoves(codes, player)
+            counts = legal.sum(axis=1)
+            winners = self.winners(codes, player)
+            finished = (winners != 0) | (counts == 0) | (turn > maxRounds)
+            for row in np.nonzero(finished)[0]:
+                winner = Player(int(winners[row])) if winners[row] else None
+                results[ids[row]] = (winner, turn, set(np.nonzero(movedPieces[ids[row]])[0].tolist()))
+            if finished.any():
+                playing = ~finished
+                codes, legal, counts, ids = codes[playing], legal[playing], counts[playing], ids[playing]
+                if not len(ids):
+                    break
+            if len(ids) <= self.handoff:
+                for row, playout in enumerate(ids):
+                    results[playout] = self.finishPlayout(codes[row], player, turn, maxRounds, movedPieces[playout], rng)
+                break
+            candidates = self.candidates[player]
+            for pieceId, start, end in candidates["pieceRanges"]:
+                if end > start:
+                    movedPieces[ids, pieceId] |= legal[:, start:end].any(axis=1)
+            choice = (legal.cumsum(axis=1) > np.floor(rng.random(len(ids)) * counts)[:, None]).argmax(axis=1)
+            rows = np.arange(len(ids))
+            origins, destinations = candidates["origins"][choice], candidates["destinations"][choice]
+            leapedOver = candidates["leapedOver"][choice]
+            captured = (codes[rows, leapedOver] >> 8) == (~player).value
+            codes[rows[captured], leapedOver[captured]] = 0
+            codes[rows, destinations] = codes[rows, origins]
+            codes[rows, origins] = 0
+            player = ~player
+            turn += 1
+        return results
+
+    def finishPlayout(self, codes, player, turn, maxRounds, movedPieces, rng):
+        game_state = GameState(self.game, self.decode(codes), player, turn)
+        generator = random.Random(int(rng.integers(2**62)))
+        moved = set(np.nonzero(movedPieces)[0].tolist())
+        pieces = game_state.board.pieces
+        while game_state.round_count <= maxRounds and game_state.winner is None and game_state.possibleMoves:
+            moves = game_state.possibleMoves
+            for move in moves:
+                moved.add(pieces[move.origin[1] * self.width + move.origin[0]])
+            game_state.make(generator.choice(moves))
+        return game_state.winner, game_state.round_count, moved
@@ -0,0 +1,195 @@
+from game_elements.player import Player
+from game_definitions.boardGame import GameState
+from game_definitions.moves import Move, Hop, Leap, Slide, HOP, SLIDE, LEAP
+from game_definitions.move_conditions import MoveCondition, Not, At, Facing, Enemy, Ally, Empty
+from game_definitions.vector import Vector
+
+def shift(mask, amount):
+    return mask << amount if amount >= 0 else mask >> -amount
+
+def bits(mask):
+    """Indices of set bits of the mask, in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class UnsupportedGame(Exception):
+    """Raised by BitboardMoves for games using moves or move conditions it cannot compile, which need the "array" engine"""
+
+class BitboardMoves:
+    """Move definitions of a game compiled into shifts of square bitmasks, see BitboardState
+
+    Bit `y * width + x` of a mask stands for square (x, y). Moving in direction (x, y) shifts a mask by `y * width + x` bits,
+    after masking out squares from which the move would leave the board (source mask of the direction).
+    Hops and leaps are single shifts, slides are ray fills repeated until the ray is blocked,
+    and At/Facing move conditions are evaluated for all squares of the board at once as masks of squares that pass them.
+
+    Attributes
+    ----------
+    game : BoardGame
+        game the moves are compiled for
+    positions : List[Vector]
+        position of every square, by index
+    full : int
+        mask of all squares of the board
+    movesets : Dict[Player, List[List[Tuple]]]
+        for every player and piece id, list of (move definition, shift, source mask, whether its condition targets the destination) tuples
+
+    Raises UnsupportedGame for games with moves or move conditions that cannot be compiled into masks.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.width = game.initialBoard.width
+        self.height = game.initialBoard.height
+        self.size = self.width * self.height
+        self.full = (1 << self.size) - 1
+        self.positions = [Vector(index % self.width, index // self.width) for index in range(self.size)]
+        self.sources = {}
+        self.movesets = {}
+        for player in [Player.P1, Player.P2]:
+            movesets = []
+            for piece in game.piece_types[player]:
+                moveset = []
+                for move in piece.moveset if piece is not None else []:
+                    if type(move) not in [Hop, Leap, Slide]:
+                        raise UnsupportedGame("Unsupported move " + type(move).__name__)
+                    targetsDestination = move.condition is not None and self.checkCondition(move.condition)
+                    steps = 2 if type(move) == Leap else 1
+                    moveset.append((move, self.offset(move.direction), self.source(move.direction, steps), targetsDestination))
+                movesets.append(moveset)
+            self.movesets[player] = movesets
+
+    def checkCondition(self, condition):
+        """Whether the condition is checked at destinations of the moves, raises UnsupportedGame if it cannot be compiled"""
+        while type(condition) == Not:
+            condition = condition.condition
+        if type(condition) != MoveCondition or type(condition.selector) not in [At, Facing] \
+                or type(condition.checker) not in [Enemy, Ally, Empty]:
+            raise UnsupportedGame("Unsupported move condition")
+        return condition.targetsDestination
+
+    def offset(self, direction):
+        return direction[1] * self.width + direction[0]
+
+    def source(self, direction, steps=1):
+        """Mask of squares from which moving given number of steps in the direction stays on the board"""
+        key = (direction[0], direction[1], steps)
+        if key not in self.sources:
+            mask = 0
+            for index in range(self.size):
+                x, y = index % self.width + steps * direction[0], index // self.width + steps * direction[1]
+                if 0 <= x < self.width and 0 <= y < self.height:
+                    mask |= 1 << index
+            self.sources[key] = mask
+        return self.sources[key]
+
+    def conditionMask(self, condition, own, enemy, cache):
+        """Mask of squares (origins or destinations, see MoveCondition.targetsDestination) for which the condition passes"""
+        if type(condition) == Not:
+            return self.full & ~self.conditionMask(condition.condition, own, enemy, cache)
+        key = id(condition)
+        if key in cache:
+            return cache[key]
+        direction = condition.selector.direction
+        offset, onBoard = self.offset(direction), self.source(direction)
+        empty = self.full & ~(own | enemy)
+        checker = type(condition.checker)
+        if type(condition.selector) == At:
+            if checker == Enemy:
+                mask = shift(enemy, -offset) & onBoard
+            elif checker == Ally:
+                mask = shift(own, -offset) & onBoard
+            else:
+                mask = (shift(empty, -offset) & onBoard) | (self.full & ~onBoard)
+        else:
+            facingEnemy, facingAlly = self.facing(enemy, empty, offset, onBoard), self.facing(own, empty, offset, onBoard)
+            if checker == Enemy:
+                mask = facingEnemy
+            elif checker == Ally:
+                mask = facingAlly
+            else:
+                mask = self.full & ~(facingEnemy | facingAlly)
+        cache[key] = mask
+        return mask
+
+    def facing(self, pieces, empty, offset, onBoard):
+        """Mask of squares from which the first occupied square in the direction holds one of given pieces"""
+        mask = shift(pieces, -offset) & onBoard
+        while True:
+            extended = mask | (shift(mask & empty, -offset) & onBoard)
+            if extended == mask:
+                return mask
+            mask = extended
+
+    def generate(self, board, player):
+        """Legal moves of all pieces of the player, by square index of their origin, in the order used by GameState.legalMovesAt"""
+        own, enemy = board.masks[player.value], board.masks[(~player).value]
+        empty = self.full & ~(own | enemy)
+        positions = self.positions
+        pieces = board.pieces
+        typeMasks = {}
+        movesBySquare = {}
+        for index in board.locations[player.value]:
+            typeMasks[pieces[index]] = typeMasks.get(pieces[index], 0) | (1 << index)
+            movesBySquare[index] = []
+        cache = {}
+        movesets = self.movesets[player]
+        for pieceId, pieceOrigins in typeMasks.items():
+            for move, offset, source, targetsDestination in movesets[pieceId]:
+                origins, passed = pieceOrigins, self.full
+                if move.condition is not None:
+                    if targetsDestination:
+                        passed = self.conditionMask(move.condition, own, enemy, cache)
+                    else:
+                        origins &= self.conditionMask(move.condition, own, enemy, cache)
+                kind = type(move)
+                start = origins & source
+                if kind == Hop:
+                    destinations = shift(start, offset) & ~own & passed
+                    if not move.can_attack:
+                        destinations &= empty
+                    for destination in bits(destinations):
+                        capture = positions[destination] if enemy >> destination & 1 else None
+                        movesBySquare[destination - offset].append(Move(positions[destination - offset], positions[destination], HOP, capture))
+                elif kind == Leap:
+                    destinations = shift(start, 2 * offset) & empty & passed
+                    for destination in bits(destinations):
+                        over = destination - offset
+                        capture = positions[over] if enemy >> over & 1 else None
+                        movesBySquare[over - offset].append(Move(positions[over - offset], positions[destination], LEAP, capture))
+                else:
+                    ray, step = start, 1
+                    while ray:
+                        ray = shift(ray, offset) & ~own
+                        for destination in bits(ray & passed):
+                            capture = positions[destination] if enemy >> destination & 1 else None
+                            origin = destination - step * offset
+                            movesBySquare[origin].append(Move(positions[origin], positions[destination], SLIDE, capture))
+                        ray &= empty & source
+                        step += 1
+        return movesBySquare
+
+class BitboardState(GameState):
+    """GameState generating legal moves with BitboardMoves of its game instead of move definitions of single pieces
+
+    Moves of all pieces of a player are generated together and cached until the next move.
+    Generated moves are equal, and in the same order, to the ones of GameState.
+    """
+
+    def legalMovesAt(self, index):
+        moves = self._movesBySquare.get(index)
+        if moves is None:
+            owner = self.board.owners[index]
+            player = Player.P1 if owner == Player.P1.value else Player.P2
+            self._movesBySquare.update(self.game.bitboards.generate(self.board, player))
+            moves = self._movesBySquare[index]
+        return moves
+
+    def invalidateMoves(self, record):
+        record.invalidated = self._movesBySquare
+        self._movesBySquare = {}
+
+    def restoreMoves(self, record):
+        self._movesBySquare = record.invalidated
@@ -1,7 +1,9 @@
 from game_definitions.win_conditions import winConditionFromDict
 from game_elements.player import Player
 from game_elements.piece import Piece
-from game_elements.board import Board
+from game_elements.board import Board, OWNERS
+from game_elements.zobrist import SIDE_TO_MOVE
+from .move_tables import DependencyMap
 from .moves import Move
 from .vector import Vector
 from copy import copy, deepcopy
@@ -18,21 +20,57 @@ class BoardGame():
         Ordered definition of all possible types of pieces in a game. During the game all pieces are defined by a number that represents index of this list. 
     winConditions : List[Condition]
         List of all conditions that define when a player achieves victory
+    engine : str
+        move generator of game states of the game, "array" for GameState or "bitboard" for BitboardState (see game_definitions.bitboard);
+        the bitboard engine raises bitboard.UnsupportedGame on first move generation when the game's moves cannot be compiled,
+        such games have to use "array"
 
     """
 
-    def __init__(self, board, player2mirrored, listOfPieces, winConditions):
+    def __init__(self, board, player2mirrored, listOfPieces, winConditions, engine="array"):
         self.initialBoard = board
         self.initialBoard.game = self
         self.isPlayer2mirrored = player2mirrored
         self.piece_types   = { Player.P1:listOfPieces,  Player.P2:self.invertPieces(listOfPieces) }
         self.winConditions = { Player.P1:winConditions, Player.P2:self.invertConditions(winConditions) }
+        self.engine = engine
+        self._dependencyMap = None
+        self._bitboards = None
+        self.compileMoves()
+        self.compileWinConditions()
+
+    def compileMoves(self):
+        """Precomputes lookup tables of all move definitions of both players for the board of this game"""
+        for player in [Player.P1, Player.P2]:
+            for piece in self.piece_types[player][1:]:
+                for move in piece.moveset:
+                    move.compile(self.initialBoard.width, self.initialBoard.height)
+
+    def compileWinConditions(self):
+        """Precomputes bitmasks of win conditions of both players for the board of this game, see Board.masks"""
+        for player in [Player.P1, Player.P2]:
+            self.winConditions[player].compile(self.initialBoard.width, self.initialBoard.height)
+
+    @property
+    def dependencyMap(self):
+        """DependencyMap of all piece types of the game, built on first use"""
+        if self._dependencyMap is None:
+            self._dependencyMap = DependencyMap(self)
+        return self._dependencyMap
+
+    @property
+    def bitboards(self):
+        """BitboardMoves of all piece types of the game, built on first use, raises bitboard.UnsupportedGame if they cannot be compiled"""
+        if self._bitboards is None:
+            from .bitboard import BitboardMoves
+            self._bitboards = BitboardMoves(self)
+        return self._bitboards
 
     def __copy__(self):
-        return BoardGame(self.initialBoard, self.isPlayer2mirrored, self.piece_types[Player.P1], self.winConditions)
+        return BoardGame(self.initialBoard, self.isPlayer2mirrored, self.piece_types[Player.P1], self.winConditions, self.engine)
 
     def __deepcopy__(self, memo):
-        return BoardGame(deepcopy(self.initialBoard, memo), self.isPlayer2mirrored, deepcopy(self.piece_types[Player.P1], memo), deepcopy(self.winConditions, memo))
+        return BoardGame(deepcopy(self.initialBoard, memo), self.isPlayer2mirrored, deepcopy(self.piece_types[Player.P1], memo), deepcopy(self.winConditions, memo), self.engine)
     
     def invertPieces(self, listOfPieces):
         pieces = []
@@ -44,12 +82,16 @@ class BoardGame():
         return winConditions.invert(self.initialBoard)
         
     def initialState(self):
+        if self.engine == "bitboard":
+            from .bitboard import BitboardState
+            return BitboardState(self, self.initialBoard)
         return GameState(self, self.initialBoard)
 
     def toDict(self):
         rows = [["0" for _ in range(self.initialBoard.width)] for _ in range((self.initialBoard.height // 2) + 1)]
         highestRow = 0
-        for (x,y), square in self.initialBoard.matrix.items():
+        for square in self.initialBoard.iterate():
+            x,y = square.coords
             if (y >= self.initialBoard.height // 2 + 1):
                 continue
             rows[y][x] = square.piece
@@ -89,42 +131,68 @@ class GameState():
     currentPlayer : Player
         player that has control of current turn
 
+    Legal moves are cached per square of the board, after a move only pieces affected by it (see DependencyMap) regenerate their moves.
     """
     def __init__(self, game, board, player = Player.P1, round_count=0):
         self.game = game
         self.board = deepcopy(board)
         self.currentPlayer = player
         self.round_count = round_count
-        self._possibleStates = None
         self._possibleMoves = None
+        self._movesBySquare = {}
 
     def __hash__(self):
-        return (self.board, self.currentPlayer).__hash__()
+        return self.key
 
     def __eq__(self, other):
-        return self.board == other.board and self.currentPlayer == other.currentPlayer
+        return self.key == other.key and self.currentPlayer == other.currentPlayer and self.board == other.board
+
+    @property
+    def key(self):
+        """64-bit Zobrist key of the state, combining placement of the pieces with player that has control of current turn"""
+        if self.currentPlayer == Player.P2:
+            return self.board.key ^ SIDE_TO_MOVE
+        return self.board.key
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_possibleMoves"] = None
+        state["_movesBySquare"] = {} #cached moves are regenerated when needed, keeping pickled states small
+        return state
 
     def copy(self):
-        return GameState(self.game, self.board, player=self.currentPlayer, round_count=self.round_count)
+        state = type(self)(self.game, self.board, player=self.currentPlayer, round_count=self.round_count)
+        state._movesBySquare = self._movesBySquare.copy()
+        return state
 
     @property
     def possibleStates(self):
+        """Iterator over states following legal moves of the current player, every state is built only when reached"""
         if(not self.winner is None):
-            return []
-        states = []
-        for move in self.possibleMoves:
-            states.append(self.applyMove(move))
-        return states
+            return iter(())
+        return (self.applyMove(move) for move in self.possibleMoves)
 
     @property
     def possibleMoves(self):
         if self._possibleMoves is None:
-            possibleMoves = [] 
-            for piece in self.getCurrentPlayersPieces():
-                for move in piece.getLegalMoves():
-                    possibleMoves.append(move)
+            possibleMoves = []
+            for index in self.board.locations[self.currentPlayer.value]:
+                possibleMoves += self.legalMovesAt(index)
             self._possibleMoves = possibleMoves
         return self._possibleMoves
+
+    def legalMovesAt(self, index):
+        """Legal moves of a piece placed on square with given index, regardless of which player has control of current turn"""
+        moves = self._movesBySquare.get(index)
+        if moves is None:
+            board = self.board
+            piece = self.game.piece_types[OWNERS[board.owners[index]]][board.pieces[index]]
+            position = board.position(index)
+            moves = []
+            for move in piece.moveset:
+                moves += move.validMoves(board, position)
+            self._movesBySquare[index] = moves
+        return moves
     
     @property
     def finished(self):
@@ -138,7 +206,7 @@ class GameState():
     
     @property
     def winner(self):
-        if len(self.getPiecesForPlayer(self.currentPlayer)) == 0:
+        if self.board.totals[self.currentPlayer.value] == 0:
             return ~self.currentPlayer
         winCondition = self.game.winConditions[~self.currentPlayer]
         if winCondition.check(self.board):
@@ -149,11 +217,7 @@ class GameState():
         return self.getPiecesForPlayer(self.currentPlayer)
 
     def getPiecesForPlayer(self, player):
-        pieces = []
-        for square in self.board.iterate():
-            if square.owner == player:
-                pieces.append(square)
-        return pieces
+        return list(self.board.iterate(player))
 
     def applyMove(self, moveInfo):
         """Function that applies specified move to the current game state and returns new game state, thread-safe but slow"""
@@ -162,23 +226,51 @@ class GameState():
         return newState 
 
     def applyMove_(self, moveInfo):
-        """Function that applies specified move to the current game state and returns new game state, thread-safe but slow"""
-        moveInfo.apply(self)
+        """Function that applies specified move to the current game state in place"""
+        self.make(moveInfo)
+
+    def make(self, move):
+        """Applies specified move to the current game state in place, returns record that has to be passed to 'unmake' to revert it"""
+        return move.apply(self)
 
-    def nextRound(self):
+    def unmake(self, record):
+        """Reverts a move applied with 'make', moves have to be reverted in reverse order of application"""
+        self.board.movePiece(record.move.destination, record.move.origin)
+        captured = record.captured
+        if captured is not None:
+            self.board.place(captured.coords, captured.piece, captured.owner)
+        self.currentPlayer = record.player
+        self.round_count = record.round_count
+        self._possibleMoves = record.possibleMoves
+        self.restoreMoves(record)
+
+    def invalidateMoves(self, record):
+        """Drops cached legal moves the move of the record could affect, keeping them in the record"""
+        squares = record.changedSquares(self.board)
+        record.invalidated = self.game.dependencyMap.invalidate(self.board, squares, self._movesBySquare)
+
+    def restoreMoves(self, record):
+        """Brings back cached legal moves dropped by 'invalidateMoves'"""
+        movesBySquare = self._movesBySquare
+        for index, moves in record.invalidated.items():
+            if moves is None:
+                movesBySquare.pop(index, None)
+            else:
+                movesBySquare[index] = moves
+
+    def nextRound(self, record=None):
+        """Passes control to the other player, record of the move that ended the turn is used to refresh cached legal moves"""
         self.currentPlayer = ~self.currentPlayer
         self.round_count += 1
+        self._possibleMoves = None
+        if record is not None:
+            self.invalidateMoves(record)
         return self
 
     def simulateRandomPlayout(self):
         game_state = self.copy()
-        states = {game_state}
         while not game_state.finished:
-            #game_state._possibleMoves = None
-            moves = game_state.possibleMoves
-            moveInfo = random.choice(moves)
-            game_state = game_state.applyMove(moveInfo)
-            states |= {game_state}
+            game_state.make(random.choice(game_state.possibleMoves))
         return game_state.winner
 
     def getHeuristicValue(self):
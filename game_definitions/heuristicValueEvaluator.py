@@ -1,7 +1,8 @@
 from game_definitions.boardGame import BoardGame, GameState
 from game_elements.player import Player
-from game_definitions.moves import Hop, Leap, Slide, Move 
+from game_definitions.moves import Hop, Leap, Slide, Move, UndoRecord
 from game_definitions.win_conditions import And,Or,EnemyPieceTypeRemoved,EnemyTotalPiecesLeft,PieceIsPlacedAt
+import evaluator
 
 class HeuristicCalculator:
 
@@ -11,11 +12,13 @@ class HeuristicCalculator:
         Slide : lambda _ : 2.25
     }
 
-    def __init__(self, game:BoardGame):
+    def __init__(self, game:BoardGame, moveDistances=False):
         self.game = game
+        self.moveDistances = moveDistances
         self.modifiers = [1,1,1]
         self.pieceTypesEvaluated = self.evaluateGamePieces(game.piece_types[Player.P1][1:])
         self.maxDistance = game.initialBoard.width + game.initialBoard.height
+        self.placedAtConditions = []
         self.conditionEvaluator = {
             Player.P1 : self.prepareWinConditionCalculation(game.winConditions[Player.P1]),
             Player.P2 : self.prepareWinConditionCalculation(game.winConditions[Player.P2])
@@ -39,46 +42,62 @@ class HeuristicCalculator:
     def prepareAnd(self, condition:And):
         evaluator1 = self.prepareWinConditionCalculation(condition.conditionA)
         evaluator2 = self.prepareWinConditionCalculation(condition.conditionB)
-        def evaluate(game_state):
-            return (evaluator1(game_state) + evaluator2(game_state)) / 2
+        def evaluate(summary):
+            return (evaluator1(summary) + evaluator2(summary)) / 2
         return evaluate
 
     def prepareOr(self, condition:Or):
         evaluator1 = self.prepareWinConditionCalculation(condition.conditionA)
         evaluator2 = self.prepareWinConditionCalculation(condition.conditionB)
-        def evaluate(game_state):
-            return min(evaluator1(game_state),evaluator2(game_state))
+        def evaluate(summary):
+            return min(evaluator1(summary),evaluator2(summary))
         return evaluate
 
     def preparePlacedAt(self, condition:PieceIsPlacedAt):
-        target_squares = condition.target_squares
-        def evaluate(game_state):
-            squares = game_state.getPiecesForPlayer(condition.player)
-            minDistance = 999999
-            for square in squares:
-                for targetSquare in target_squares:
-                    x,y = square.coords.x - targetSquare[0], square.coords.y - targetSquare[1]
-                    distance = abs(x) + abs(y)
-                    if(distance < minDistance):
-                        minDistance = distance
+        conditionIndex = len(self.placedAtConditions)
+        self.placedAtConditions.append((condition.player.value, self.prepareDistanceMaps(condition)))
+        def evaluate(summary):
+            minDistance = summary.distances[conditionIndex]
             return ((self.maxDistance - minDistance) / self.maxDistance) * 100
         return evaluate
 
     def prepareTypeRemoved(self, condition: EnemyPieceTypeRemoved):
+        enemy = (~condition.player).value
         totalNumber = len([square for square in self.game.initialBoard.iterate() if square.owner == ~condition.player and square.piece == condition.pieceId])
-        def evaluate(game_state):
-            squares = len([square for square in game_state.getPiecesForPlayer(~condition.player) if square.pieceId == condition.pieceId])
+        def evaluate(summary):
+            squares = summary.counts[enemy][condition.pieceId]
             return ((totalNumber - squares) / totalNumber) * 100
         return evaluate
 
     def prepareTotalLeft(self, condition: EnemyTotalPiecesLeft):
+        enemy = (~condition.player).value
         totalNumber = len([square for square in self.game.initialBoard.iterate() if square.owner == ~condition.player])
         totalNumber -= condition.totalLeft
-        def evaluate(game_state):
-            currentNumber = len(game_state.getPiecesForPlayer(~condition.player)) - condition.totalLeft
+        def evaluate(summary):
+            currentNumber = summary.totals[enemy] - condition.totalLeft
             return ((totalNumber - currentNumber) / totalNumber) * 100
         return evaluate
 
+    def prepareDistanceMaps(self, condition:PieceIsPlacedAt):
+        """Distance from every square (by index) to the closest target square of the condition, for every piece id of its player
+
+        Distances are Manhattan distances, or numbers of moves needed by the piece (see evaluator.pieceDistances) when 'moveDistances' is set,
+        in which case squares from which the targets cannot be reached get maxDistance.
+        """
+        board = self.game.initialBoard
+        manhattan = []
+        for index in range(board.width * board.height):
+            x, y = index % board.width, index // board.width
+            manhattan.append(min([abs(x - targetX) + abs(y - targetY) for targetX, targetY in condition.target_squares], default=999999))
+        pieces = self.game.piece_types[condition.player]
+        if not self.moveDistances:
+            return [manhattan] * len(pieces)
+        maps = [manhattan]
+        for piece in pieces[1:]:
+            distances = evaluator.pieceDistances(piece.moveset, condition.target_squares, board)
+            maps.append([self.maxDistance if distance is None else distance for distance in distances])
+        return maps
+
     def evaluateGamePieces(self, pieces):
         piecesValues = {}
         for i, piece in enumerate(pieces):
@@ -106,30 +125,142 @@ class HeuristicCalculator:
             conditionMultiplicator = 0.8
         return (baseValue + directionBonus) * conditionMultiplicator
         
-    def evaluateCurrentMobility(self, game_state, player):
-        squares = game_state.getPiecesForPlayer(player)
-        mobilitySum = 0
-        for square in squares:
-            baseValue = self.pieceTypesEvaluated[square.piece]
-            mobility = len(square.getLegalMoves())
-            mobilitySum += baseValue * mobility
-        return mobilitySum
-
-    def evaluateBoardStrength(self, game_state, player):
-        value = 0
-        for square in game_state.getPiecesForPlayer(player):
-            value += self.pieceTypesEvaluated[square.piece]
-        return value
+    def summarize(self, game_state):
+        """BoardSummary of the game state, gathered in a single pass over locations of the pieces"""
+        summary = BoardSummary(len(self.pieceTypesEvaluated), len(self.placedAtConditions))
+        board = game_state.board
+        values = self.pieceTypesEvaluated
+        for owner in [1, 2]:
+            for index in board.locations[owner]:
+                piece = board.pieces[index]
+                value = values[piece]
+                summary.strength[owner] += value
+                summary.mobility[owner] += value * len(game_state.legalMovesAt(index))
+                summary.counts[owner][piece] += 1
+                for conditionIndex, (player, distanceMaps) in enumerate(self.placedAtConditions):
+                    if player == owner:
+                        summary.distances[conditionIndex] = min(summary.distances[conditionIndex], distanceMaps[piece][index])
+            summary.totals[owner] = board.totals[owner]
+        return summary
 
-    def calculatePlayer(self, game_state, player):
-        strength = self.evaluateBoardStrength(game_state, player)
-        mobility = self.evaluateCurrentMobility(game_state, player)
-        conditions = self.conditionEvaluator[player](game_state)
+    def combine(self, summary, player):
+        strength = summary.strength[player.value]
+        mobility = summary.mobility[player.value]
+        conditions = self.conditionEvaluator[player](summary)
         return ((strength * self.modifiers[0]) + \
                (mobility * self.modifiers[1]) + \
                (conditions * self.modifiers[2])) / sum(self.modifiers)
 
+    def calculatePlayer(self, game_state, player):
+        return self.combine(self.summarize(game_state), player)
+
     def calculate(self, game_state:GameState):
-        player1value = self.calculatePlayer(game_state, Player.P1)
-        player2value = self.calculatePlayer(game_state, Player.P2)
-        return [player1value, player2value]
\ No newline at end of file
+        summary = self.summarize(game_state)
+        return [self.combine(summary, Player.P1), self.combine(summary, Player.P2)]
+
+    def incremental(self, game_state):
+        """IncrementalEvaluation following changes of the game state"""
+        return IncrementalEvaluation(self, game_state)
+
+class BoardSummary:
+    """Terms of the heuristic value of a board, indexed by owner value (see Board.owners)
+
+    Attributes
+    ----------
+    strength : List[float]
+        sum of values of the pieces of each player
+    mobility : List[float]
+        sum of values of the pieces of each player, weighted by their number of legal moves
+    counts : List[List[int]]
+        number of pieces of each player, by piece id
+    totals : List[int]
+        number of pieces of each player
+    distances : List[int]
+        for every PieceIsPlacedAt condition (see HeuristicCalculator.placedAtConditions), distance from the closest piece to its target
+    """
+
+    def __init__(self, n_pieces, n_placedAt):
+        self.strength = [0, 0, 0]
+        self.mobility = [0, 0, 0]
+        self.counts = [[0] * (n_pieces + 1) for _ in range(3)]
+        self.totals = [0, 0, 0]
+        self.distances = [999999] * n_placedAt
+
+class IncrementalEvaluation:
+    """Heuristic value of a game state, kept up to date from changes of the state's squares instead of rescanning the board
+
+    After GameState.make or GameState.unmake, 'update' with the undo record updates material and piece counts of squares changed by
+    the move and marks them, together with squares whose legal moves it could affect (see UndoRecord.invalidated), for re-evaluation
+    of their mobility, which is done only when the value is calculated. Distances of PieceIsPlacedAt conditions are kept
+    as histograms of distances of all pieces of the player, so the closest one is known after pieces move or get captured.
+
+    Attributes
+    ----------
+    calculator : HeuristicCalculator
+        calculator the evaluation follows
+    game_state : GameState
+        evaluated game state, changed in place by the caller
+    summary : BoardSummary
+        current terms of the heuristic value, mobility and distances are brought up to date by 'calculate'
+    """
+
+    def __init__(self, calculator, game_state):
+        self.calculator = calculator
+        self.game_state = game_state
+        size = len(game_state.board.pieces)
+        self.summary = BoardSummary(len(calculator.pieceTypesEvaluated), len(calculator.placedAtConditions))
+        self.pieces = bytearray(size)
+        self.owners = bytearray(size)
+        self.mobility = [0] * size
+        self.dirty = set()
+        self.histograms = [[0] * (calculator.maxDistance + 1) for _ in calculator.placedAtConditions]
+        self.update(range(size))
+
+    def update(self, squares):
+        """Updates given squares (indices, or an UndoRecord of the last make/unmake)"""
+        if isinstance(squares, UndoRecord):
+            record = squares
+            squares = record.changedSquares(self.game_state.board)
+            self.dirty.update(record.invalidated)
+        self.dirty.update(squares)
+        summary = self.summary
+        board = self.game_state.board
+        values = self.calculator.pieceTypesEvaluated
+        for index in squares:
+            piece, owner = self.pieces[index], self.owners[index]
+            newPiece, newOwner = board.pieces[index], board.owners[index]
+            if piece == newPiece and owner == newOwner:
+                continue
+            if owner:
+                summary.strength[owner] -= values[piece]
+                summary.mobility[owner] -= self.mobility[index]
+                summary.counts[owner][piece] -= 1
+                summary.totals[owner] -= 1
+                self.changeDistances(owner, piece, index, -1)
+            self.pieces[index], self.owners[index] = newPiece, newOwner
+            self.mobility[index] = 0
+            if newOwner:
+                summary.strength[newOwner] += values[newPiece]
+                summary.counts[newOwner][newPiece] += 1
+                summary.totals[newOwner] += 1
+                self.changeDistances(newOwner, newPiece, index, 1)
+
+    def changeDistances(self, owner, piece, index, change):
+        for conditionIndex, (player, distanceMaps) in enumerate(self.calculator.placedAtConditions):
+            if player == owner:
+                self.histograms[conditionIndex][distanceMaps[piece][index]] += change
+
+    def calculate(self):
+        """Heuristic values of both players, equal (up to rounding) to HeuristicCalculator.calculate of the game state"""
+        summary = self.summary
+        values = self.calculator.pieceTypesEvaluated
+        for index in self.dirty:
+            owner = self.owners[index]
+            if owner:
+                mobility = values[self.pieces[index]] * len(self.game_state.legalMovesAt(index))
+                summary.mobility[owner] += mobility - self.mobility[index]
+                self.mobility[index] = mobility
+        self.dirty.clear()
+        for conditionIndex, histogram in enumerate(self.histograms):
+            summary.distances[conditionIndex] = next((distance for distance, count in enumerate(histogram) if count), 999999)
+        return [self.calculator.combine(summary, Player.P1), self.calculator.combine(summary, Player.P2)]
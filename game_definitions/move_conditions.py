@@ -8,6 +8,12 @@ class At:
     def get(self, board, position):
         return position + self.direction
 
+    def squares(self, width, height, position):
+        x, y = position[0] + self.direction[0], position[1] + self.direction[1]
+        if 0 <= x < width and 0 <= y < height:
+            return [(x, y)]
+        return []
+
     def toString(self):
         return "at " + self.direction.asDirection()
 
@@ -21,6 +27,14 @@ class Facing:
     def toString(self):
         return "facing " + self.direction.asDirection()
 
+    def squares(self, width, height, position):
+        squares = []
+        x, y = position[0] + self.direction[0], position[1] + self.direction[1]
+        while 0 <= x < width and 0 <= y < height:
+            squares.append((x, y))
+            x, y = x + self.direction[0], y + self.direction[1]
+        return squares
+
     def get(self, board, position):
         current_position = position + self.direction
         while board.contains(current_position):
@@ -28,7 +42,7 @@ class Facing:
             if not current_square.isEmpty():
                 return current_position
             current_position += self.direction
-        return board[current_position]
+        return current_position
 
 class Enemy:
     def check(self, origin, destination):
@@ -61,6 +75,9 @@ class Not:
     def check(self, origin, destination):
         return not self.condition.check(origin, destination)
 
+    def dependencies(self, width, height, origin, destination):
+        return self.condition.dependencies(width, height, origin, destination)
+
     def toString(self):
         return "not " + self.condition.toString()
 
@@ -80,6 +97,10 @@ class MoveCondition:
         target = self.selector.get(board, self.getTarget(move))
         return self.checker.check(board[move.origin], board[target])
 
+    def dependencies(self, width, height, origin, destination):
+        """Squares (apart from the origin) that have to be looked at to check this condition for a move from origin to destination"""
+        return self.selector.squares(width, height, destination if self.targetsDestination else origin)
+
     def targetOrigin(self, move):
         return move.origin
 
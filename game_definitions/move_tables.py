@@ -0,0 +1,43 @@
+from game_elements.player import Player
+
+class DependencyMap:
+    """Reverse map from a square of the board to pieces whose legal moves depend on content of that square
+
+    For every player, piece type and square of the board, moves of the piece placed on that square can only change
+    when one of the squares reported by 'dependencies' of its move definitions changes.
+    The map inverts that relation, so after a move only pieces that could be affected by it need their moves regenerated.
+
+    Attributes
+    ----------
+    dependents : List[List[Tuple[int, int, int]]]
+        for every square index, list of (origin index, piece id, owner value) such that the piece with given id and owner
+        placed at the origin has to regenerate its moves when the square changes
+    """
+
+    def __init__(self, game):
+        width, height = game.initialBoard.width, game.initialBoard.height
+        self.dependents = [[] for _ in range(width * height)]
+        for player in [Player.P1, Player.P2]:
+            for pieceId, piece in enumerate(game.piece_types[player]):
+                if piece is None:
+                    continue
+                for origin in range(width * height):
+                    position = (origin % width, origin // width)
+                    squares = set()
+                    for move in piece.moveset:
+                        squares.update(move.dependencies(width, height, position))
+                    squares.discard(position)
+                    for x, y in squares:
+                        self.dependents[y * width + x].append((origin, pieceId, player.value))
+
+    def invalidate(self, board, squares, movesBySquare):
+        """Removes cached moves of pieces affected by changes of given squares, returns removed entries (None if there was nothing cached)"""
+        removed = {}
+        pieces, owners = board.pieces, board.owners
+        for square in squares:
+            if square not in removed:
+                removed[square] = movesBySquare.pop(square, None)
+            for origin, piece, owner in self.dependents[square]:
+                if origin not in removed and pieces[origin] == piece and owners[origin] == owner:
+                    removed[origin] = movesBySquare.pop(origin, None)
+        return removed
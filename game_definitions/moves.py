@@ -3,21 +3,134 @@ from game_elements.board import Board
 from game_definitions import move_conditions 
 from .vector import Vector
 
-class Move:
-    def __init__(self, origin, destination, apply_func):
-        self.origin = origin
-        self.destination = destination
-        self.apply_func = apply_func
+HOP, SLIDE, LEAP = 0, 1, 2
+
+class Move(tuple):
+    """Legal move of a piece, a plain record (origin, destination, kind, capture) applied according to its kind
+
+    Positions are shared Vectors from lookup tables of move definitions, so moves hold no per-move state apart from the tuple.
+
+    Attributes
+    ----------
+    origin : Vector
+        square the piece moves from
+    destination : Vector
+        square the piece moves to
+    kind : int
+        HOP, SLIDE or LEAP, selects the function applying the move
+    capture : Vector
+        square of the enemy piece removed by the move, None if nothing is captured
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, origin, destination, kind, capture=None):
+        return tuple.__new__(cls, (origin, destination, kind, capture))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def origin(self):
+        return self[0]
+
+    @property
+    def destination(self):
+        return self[1]
+
+    @property
+    def kind(self):
+        return self[2]
+
+    @property
+    def capture(self):
+        return self[3]
 
     def apply(self, state):
-        self.apply_func(self.origin, self.destination, state.board)
-        state.nextRound()
+        """Applies the move to the given game state in place, returns UndoRecord that reverts it"""
+        captured = APPLY[self[2]](self, state.board)
+        record = UndoRecord(self, captured, state.currentPlayer, state.round_count, state._possibleMoves)
+        state.nextRound(record)
+        return record
+
+def applyToDestination(move, board):
+    """Moves the piece, replacing an enemy piece standing at the destination (hops and slides), returns the captured square"""
+    captured = None if move[3] is None else board[move[3]]
+    board.movePiece(move[0], move[1])
+    return captured
+
+def applyOver(move, board):
+    """Moves the piece, removing an enemy piece it leaped over (leaps), returns the captured square"""
+    captured = None
+    if move[3] is not None:
+        captured = board[move[3]]
+        board.remove(move[3])
+    board.movePiece(move[0], move[1])
+    return captured
+
+APPLY = (applyToDestination, applyToDestination, applyOver)
+
+class UndoRecord:
+    """Information needed to revert a move applied in place, see GameState.make and GameState.unmake
+
+    Attributes
+    ----------
+    move : Move
+        move that was applied, its piece is now placed at move.destination
+    captured : Square
+        enemy piece removed from the board by the move, None if nothing was captured
+    player : Player
+        player that made the move
+    round_count : int
+        round count of the game state before the move
+    possibleMoves : List[Move]
+        legal moves cached by the game state before the move
+    invalidated : Dict[int, List[Move]]
+        legal moves of pieces (by square index) that were dropped from the game state's cache because the move could affect them
+    """
+
+    def __init__(self, move, captured, player, round_count, possibleMoves):
+        self.move = move
+        self.captured = captured
+        self.player = player
+        self.round_count = round_count
+        self.possibleMoves = possibleMoves
+        self.invalidated = None
+
+    def changedSquares(self, board):
+        squares = [board.index(self.move.origin), board.index(self.move.destination)]
+        if self.captured is not None:
+            squares.append(board.index(self.captured.coords))
+        return squares
+
+_boardSquares = {}
+
+def boardSquares(width, height):
+    """(index, position) pairs of all squares of a board with given dimensions, shared by lookup tables of all move definitions"""
+    squares = _boardSquares.get((width, height))
+    if squares is None:
+        squares = [(index, Vector(index % width, index // width)) for index in range(width * height)]
+        _boardSquares[(width, height)] = squares
+    return squares
+
+_tables = {}
+
+def compiledTable(move, width, height):
+    """Lookup table of the move definition for a board with given dimensions, built once for every kind of move, direction and board size"""
+    key = (type(move), move.direction, width, height)
+    table = _tables.get(key)
+    if table is None:
+        table = move.buildTable(width, height)
+        _tables[key] = table
+    return table
 
 class Hop:
     def __init__(self, destination, can_attack=False, condition=None):
         self.direction = destination
         self.can_attack = can_attack
         self.condition = condition
+        self.table = None
+        self.tableSize = None
 
     def inverted(self, axis=0):
         move_to = self.direction.inverted(axis)
@@ -26,22 +139,39 @@ class Hop:
             condition = self.condition.inverted(axis)
         return Hop(move_to, can_attack=self.can_attack, condition=condition)
 
-    def apply(self):
-        def f(origin, destination, board):
-            board.movePiece(origin, destination)
-        return f
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["table"], state["tableSize"] = None, None #shared lookup tables are rebuilt when needed, see compiledTable
+        return state
+
+    def compile(self, width, height):
+        """Precomputes destination (index and position) of this move from every square of a board with given dimensions"""
+        self.table = compiledTable(self, width, height)
+        self.tableSize = (width, height)
+        return self.table
+
+    def buildTable(self, width, height):
+        squares = boardSquares(width, height)
+        table = []
+        for index in range(width * height):
+            x, y = index % width + self.direction[0], index // width + self.direction[1]
+            table.append(squares[y * width + x] if (0 <= x < width and 0 <= y < height) else None)
+        return table
 
     def validMoves(self, board, origin):
-        destination = origin + self.direction
-        if not board.contains(destination):
+        table = self.table if self.tableSize == (board.width, board.height) else self.compile(board.width, board.height)
+        originIndex = origin[1] * board.width + origin[0]
+        target = table[originIndex]
+        if target is None:
             return []
-        orig_square = board[origin]
-        dest_square = board[destination]
-        if orig_square.owner == dest_square.owner: #Cannot move to a square occupied by friendly piece
+        destinationIndex, destination = target
+        owner = board.owners[originIndex]
+        dest_owner = board.owners[destinationIndex]
+        if owner == dest_owner: #Cannot move to a square occupied by friendly piece
             return []
-        if not self.can_attack and ~orig_square.owner == dest_square.owner: #If move is not an attacking one then cannot move to enemy square
+        if not self.can_attack and dest_owner: #If move is not an attacking one then cannot move to enemy square
             return []
-        move = Move(origin, destination, self.apply())
+        move = Move(origin, destination, HOP, destination if dest_owner else None)
         if self.condition:
             conditionPassed = self.condition.check(board, move)
             if conditionPassed:
@@ -49,6 +179,16 @@ class Hop:
             return []
         return [move]
 
+    def dependencies(self, width, height, origin):
+        """Squares (apart from the origin) whose content decides which moves of this kind are legal from the origin"""
+        destination = (origin[0] + self.direction[0], origin[1] + self.direction[1])
+        if not (0 <= destination[0] < width and 0 <= destination[1] < height):
+            return []
+        squares = [destination]
+        if self.condition:
+            squares += self.condition.dependencies(width, height, origin, destination)
+        return squares
+
     def heuristicValue(self):
         return (0.5 / (1 if self.condition else 2)) + (0.5 if self.can_attack else 0)
 
@@ -71,6 +211,8 @@ class Slide:
     def __init__(self, direction, condition):
         self.direction = direction
         self.condition = condition
+        self.table = None
+        self.tableSize = None
 
     def inverted(self,axis):
         direction = self.direction.inverted(axis) 
@@ -79,33 +221,57 @@ class Slide:
             condition = self.condition.inverted(axis)
         return Slide(direction, condition)
 
-    def apply(self):
-        def f(origin, destination, board):
-            board.movePiece(origin, destination)
-        return f
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["table"], state["tableSize"] = None, None #shared lookup tables are rebuilt when needed, see compiledTable
+        return state
+
+    def compile(self, width, height):
+        """Precomputes ray of squares (indices and positions) this move passes through from every square of a board with given dimensions"""
+        self.table = compiledTable(self, width, height)
+        self.tableSize = (width, height)
+        return self.table
+
+    def buildTable(self, width, height):
+        squares = boardSquares(width, height)
+        table = []
+        for index in range(width * height):
+            ray = []
+            x, y = index % width + self.direction[0], index // width + self.direction[1]
+            while 0 <= x < width and 0 <= y < height:
+                ray.append(squares[y * width + x])
+                x, y = x + self.direction[0], y + self.direction[1]
+            table.append(ray)
+        return table
 
     def validMoves(self, board, origin):
+        table = self.table if self.tableSize == (board.width, board.height) else self.compile(board.width, board.height)
         moves = []
-        current_square = origin + self.direction
-        while (board.contains(current_square) and board[current_square].owner is None):
-            move = Move(origin, current_square, self.apply())
-            if self.condition:
-                result = self.condition.check(board.move)
-                if result:
-                    moves.append(move)
-            else:
-                moves.append(move)
-            current_square = current_square + self.direction
-        if(board[current_square].owner == ~board[origin].owner):
-            move = Move(origin, current_square, self.apply())
-            if self.condition:
-                result = self.condition.check(board, move)
-                if result:
-                    moves.append(move)
-            else:
+        owners = board.owners
+        originIndex = origin[1] * board.width + origin[0]
+        for index, current_square in table[originIndex]:
+            squareOwner = owners[index]
+            if squareOwner:
+                if squareOwner != owners[originIndex]:
+                    move = Move(origin, current_square, SLIDE, current_square)
+                    if not self.condition or self.condition.check(board, move):
+                        moves.append(move)
+                break
+            move = Move(origin, current_square, SLIDE)
+            if not self.condition or self.condition.check(board, move):
                 moves.append(move)
         return moves
 
+    def dependencies(self, width, height, origin):
+        squares = []
+        x, y = origin[0] + self.direction[0], origin[1] + self.direction[1]
+        while 0 <= x < width and 0 <= y < height:
+            squares.append((x, y))
+            if self.condition:
+                squares += self.condition.dependencies(width, height, origin, (x, y))
+            x, y = x + self.direction[0], y + self.direction[1]
+        return squares
+
     def heuristicValue(self):
         return ((2 + abs(self.direction[0]) + self.direction[1]) / (1 if self.condition else 2)) / (1 if self.condition else 2)
 
@@ -125,7 +291,9 @@ class Leap:
     def __init__(self, direction, condition=None):
         self.direction = direction
         self.condition = condition
-        
+        self.table = None
+        self.tableSize = None
+
     def inverted(self, axis=0):
         direction = self.direction.inverted(axis)
         condition = None
@@ -133,18 +301,42 @@ class Leap:
             condition = self.condition.inverted(axis)
         return Leap(direction, condition)
 
-    def apply(self):
-        def f(origin, destination, board):
-            leapedOver = origin + self.direction
-            if(~board[origin].owner == board[leapedOver].owner):
-                board.remove(leapedOver)
-            board.movePiece(origin, destination)
-        return f
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["table"], state["tableSize"] = None, None #shared lookup tables are rebuilt when needed, see compiledTable
+        return state
+
+    def compile(self, width, height):
+        """Precomputes square leaped over and landing square (indices and positions) of this move from every square of a board with given dimensions"""
+        self.table = compiledTable(self, width, height)
+        self.tableSize = (width, height)
+        return self.table
+
+    def buildTable(self, width, height):
+        squares = boardSquares(width, height)
+        table = []
+        for index in range(width * height):
+            x, y = index % width, index // width
+            overX, overY = x + self.direction[0], y + self.direction[1]
+            landingX, landingY = x + 2 * self.direction[0], y + 2 * self.direction[1]
+            if 0 <= landingX < width and 0 <= landingY < height:
+                table.append(squares[overY * width + overX] + squares[landingY * width + landingX])
+            else:
+                table.append(None)
+        return table
 
     def validMoves(self, board, origin):
-        current_square = origin + (self.direction * 2)
-        if(board.contains(current_square) and board[current_square].owner is None):
-            move = Move(origin, current_square, self.apply())
+        table = self.table if self.tableSize == (board.width, board.height) else self.compile(board.width, board.height)
+        originIndex = origin[1] * board.width + origin[0]
+        target = table[originIndex]
+        if target is None:
+            return []
+        overIndex, leapedOver, landingIndex, current_square = target
+        owners = board.owners
+        if not owners[landingIndex]:
+            owner = owners[overIndex]
+            capture = leapedOver if owner and owner != owners[originIndex] else None
+            move = Move(origin, current_square, LEAP, capture)
             if self.condition:
                 result = self.condition.check(board, move)
                 if result:
@@ -153,6 +345,15 @@ class Leap:
             return [move]
         return []
 
+    def dependencies(self, width, height, origin):
+        destination = (origin[0] + 2 * self.direction[0], origin[1] + 2 * self.direction[1])
+        if not (0 <= destination[0] < width and 0 <= destination[1] < height):
+            return []
+        squares = [(origin[0] + self.direction[0], origin[1] + self.direction[1]), destination]
+        if self.condition:
+            squares += self.condition.dependencies(width, height, origin, destination)
+        return squares
+
     def heuristicValue(self):
         return (1 + self.direction[1] + 0.5 * (self.direction[0])) / (2 if self.condition else 1)
 
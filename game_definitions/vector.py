@@ -10,6 +10,9 @@ class Vector(tuple): #
     def __deepcopy__(self,memo):
         return Vector(self.x, self.y)
 
+    def __getnewargs__(self):
+        return (self.x, self.y)
+
     @property
     def x(self):
         return self[0]
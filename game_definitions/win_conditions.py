@@ -8,6 +8,10 @@ class And:
 
     def check(self, board):
         return self.conditionA.check(board) and self.conditionB.check(board)
+
+    def compile(self, width, height):
+        self.conditionA.compile(width, height)
+        self.conditionB.compile(width, height)
     
     def invert(self, board):
         return And(self.conditionA.invert(board), self.conditionB.invert(board), ~self.player)
@@ -26,6 +30,10 @@ class Or:
 
     def check(self, board):
         return self.conditionA.check(board) or self.conditionB.check(board)
+
+    def compile(self, width, height):
+        self.conditionA.compile(width, height)
+        self.conditionB.compile(width, height)
     
     def invert(self, board):
         return Or(self.conditionA.invert(board), self.conditionB.invert(board), ~self.player)
@@ -40,12 +48,26 @@ class PieceIsPlacedAt:
     def __init__(self, target_squares, player=Player.P1):
         self.target_squares = target_squares
         self.player = player
+        self.mask = None
+        self.maskSize = None
 
     def check(self, board):
+        if self.maskSize == (board.width, board.height):
+            return (board.masks[self.player.value] & self.mask) != 0
         for square in self.target_squares:
             if(board[square].owner == self.player):
                 return True
         return False
+
+    def compile(self, width, height):
+        """Precomputes bitmask of the target squares on a board with given dimensions, checked against Board.masks"""
+        mask = 0
+        for x, y in self.target_squares:
+            if 0 <= x < width and 0 <= y < height:
+                mask |= 1 << (y * width + x)
+        self.mask = mask
+        self.maskSize = (width, height)
+        return mask
     
     def invert(self, board):
         inverted_squares = [(a, board.height-b-1) for (a,b) in self.target_squares]
@@ -80,12 +102,10 @@ class EnemyPieceTypeRemoved:
         self.player = player
 
     def check(self, board):
-        for _,square in board.matrix.items():
-            if square.owner != ~self.player:
-                continue
-            if square.piece == self.pieceId:
-                return False
-        return True
+        return board.counts[(~self.player).value * 256 + self.pieceId] == 0
+
+    def compile(self, width, height):
+        pass #piece counts are maintained by the board
 
     def invert(self, board):
         return EnemyPieceTypeRemoved(self.pieceId, ~self.player)
@@ -101,12 +121,12 @@ class EnemyTotalPiecesLeft:
         self.player = player
 
     def check(self, board):
-        total = 0
-        for _,square in board.matrix.items():
-            if square.owner == ~self.player:
-                total += 1
+        total = board.totals[(~self.player).value]
         return total <= self.totalLeft
 
+    def compile(self, width, height):
+        pass #piece counts are maintained by the board
+
     def invert(self, board):
         return EnemyTotalPiecesLeft(self.totalLeft,~self.player)
 
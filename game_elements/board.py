@@ -1,63 +1,154 @@
-import copy
+from array import array
+from bisect import insort
 from game_definitions.vector import Vector
+from game_elements.player import Player
+from game_elements import zobrist
+
+OWNERS = (None, Player.P1, Player.P2)
 
 class Board:
     """Class representing board state at any time during the game
 
+    Pieces and their owners are kept in two flat buffers indexed by `y * width + x`,
+    which makes copying a board a matter of copying two short byte arrays.
+    Locations of the pieces of each player and numbers of pieces of every type are maintained on every change,
+    so they never require a scan of the board.
+
     Attributes
     ----------
-    x : int
+    width : int
         number of columns in the board
-    y : int
+    height : int
         number of rows in the board
-    matrix : Dict (2d vector => pieceId)
-        dictionary that holds information about location of all game pieces currently on the board
+    pieces : bytearray
+        id of a piece placed on every square of the board, 0 for empty squares
+    owners : bytearray
+        value of the Player owning the piece on every square of the board, 0 for empty squares
+    key : int
+        64-bit Zobrist key of the current placement, updated incrementally on every change of the board
+    locations : List[List[int]]
+        sorted indices of squares occupied by pieces of every player, by owner value (see 'owners')
+    counts : array
+        number of pieces of given type and owner on the board, at index `owner * 256 + piece`
+    totals : List[int]
+        number of pieces of every player on the board, by owner value
+    masks : List[int]
+        bitmask of squares occupied by pieces of every player (bit `index` set for an occupied square), by owner value
     """
-    
+
     def __init__(self, width, height, placement={}, player2Mirrored=False):
         self.width = width
         self.height = height
-        self.matrix = {}
+        self.game = None
+        self.pieces = bytearray(width * height)
+        self.owners = bytearray(width * height)
+        self.zobrist = zobrist.table(width * height)
+        self.key = 0
+        self.locations = [[], [], []]
+        self.counts = array('i', bytes(3 * 256 * 4))
+        self.totals = [0, 0, 0]
+        self.masks = [0, 0, 0]
         for (x,y), pawn_id in placement.items():
             self.place(Vector(x,y), pawn_id, Player.P1)
             player2x = self.width - x - 1 if player2Mirrored else x
             self.place(Vector(player2x, self.height - y - 1), pawn_id, Player.P2)
 
     def __copy__(self):
-        board = Board(self.width,self.height)
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
         board.game = self.game
-        board.matrix = copy.copy(self.matrix)
+        board.pieces = self.pieces[:]
+        board.owners = self.owners[:]
+        board.zobrist = self.zobrist
+        board.key = self.key
+        board.locations = [[], self.locations[1][:], self.locations[2][:]]
+        board.counts = self.counts[:]
+        board.totals = self.totals[:]
+        board.masks = self.masks[:]
         return board
 
     def __deepcopy__(self,memo):
-        board = Board(self.width, self.height)
-        board.game = self.game
-        for position, square in self.matrix.items():
-            board.place(position, square.piece, square.owner)
-        return board
+        return self.__copy__()
 
     def __hash__(self):
-        return (self.width, self.height, frozenset(self.matrix.items())).__hash__()
+        return self.key
 
     def __eq__(self, other):
-        return self.width == other.width and self.height == other.height and self.matrix == other.matrix
+        return self.key == other.key and self.width == other.width and self.height == other.height \
+            and self.pieces == other.pieces and self.owners == other.owners
+
+    def index(self, position):
+        return position[1] * self.width + position[0]
+
+    def position(self, index):
+        return Vector(index % self.width, index // self.width)
 
     def place(self, position, pieceType, owner):
-        self.matrix[position] = Square(pieceType, owner, position, self)
+        index = position[1] * self.width + position[0]
+        if self.pieces[index]:
+            self.clear(index)
+        self.pieces[index] = pieceType
+        self.owners[index] = owner.value
+        self.key ^= self.zobrist.row(pieceType, owner.value)[index]
+        insort(self.locations[owner.value], index)
+        self.counts[owner.value * 256 + pieceType] += 1
+        self.totals[owner.value] += 1
+        self.masks[owner.value] |= 1 << index
+
+    def clear(self, index):
+        piece, owner = self.pieces[index], self.owners[index]
+        self.key ^= self.zobrist.row(piece, owner)[index]
+        self.locations[owner].remove(index)
+        self.counts[owner * 256 + piece] -= 1
+        self.totals[owner] -= 1
+        self.masks[owner] ^= 1 << index
+        self.pieces[index] = 0
+        self.owners[index] = 0
 
     def remove(self, position):
-        if position in self.matrix:
-            del self.matrix[position]
-    
+        if self.contains(position):
+            index = position[1] * self.width + position[0]
+            if self.pieces[index]:
+                self.clear(index)
+
     def movePiece(self, origin, move_to):
-        self.matrix[move_to] = self.matrix[origin]
-        self.matrix[move_to].coords = move_to
-        del self.matrix[origin]
-
-    def iterate(self):
-        for _, square in  self.matrix.items():
-            yield square
-    
+        origin = origin[1] * self.width + origin[0]
+        move_to = move_to[1] * self.width + move_to[0]
+        pieces, owners = self.pieces, self.owners
+        if pieces[move_to]:
+            self.clear(move_to)
+        owner = owners[origin]
+        row = self.zobrist.row(pieces[origin], owner)
+        self.key ^= row[origin] ^ row[move_to]
+        pieces[move_to] = pieces[origin]
+        owners[move_to] = owner
+        pieces[origin] = 0
+        owners[origin] = 0
+        locations = self.locations[owner]
+        locations.remove(origin)
+        insort(locations, move_to)
+        self.masks[owner] ^= (1 << origin) | (1 << move_to)
+
+    def iterate(self, owner=None):
+        owners = self.owners
+        width = self.width
+        if owner is None:
+            for index, piece in enumerate(self.pieces):
+                if piece:
+                    yield Square(piece, OWNERS[owners[index]], Vector(index % width, index // width), self)
+            return
+        for index in self.locations[owner.value]:
+            yield Square(self.pieces[index], owner, Vector(index % width, index // width), self)
+
+    def countPieces(self, owner=None, piece=None):
+        """Number of pieces on the board, optionally only of given owner and piece type"""
+        if owner is None:
+            return self.totals[1] + self.totals[2]
+        if piece is None:
+            return self.totals[owner.value]
+        return self.counts[owner.value * 256 + piece]
+
     def contains(self, point):
         if(point[0] < 0 or point[0] >= self.width):
             return False
@@ -66,22 +157,27 @@ class Board:
         return True
 
     def __setitem__(self, key, value):
-        self.matrix[key] = value
-    
-    def __getitem__(self, key):
-        square = self.matrix.get(key)
-        if not square:
-            return Square(None, None, key, self)
-        return square
+        if value.isEmpty():
+            self.remove(key)
+        else:
+            self.place(key, value.piece, value.owner)
 
-from game_elements.player import Player
+    def __getitem__(self, key):
+        x, y = key
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = y * self.width + x
+            piece = self.pieces[index]
+            if piece:
+                coords = key if type(key) is Vector else Vector(x, y)
+                return Square(piece, OWNERS[self.owners[index]], coords, self)
+        return Square(None, None, key, self)
 
 class Square:
     """Definition of a single square on the board
 
     Single square contains information about what piece is currently on it's place and which player's is its owner
     The square is considered to be empty when value of 'piece' attribute is None
- 
+
     Attributes
     ----------
     piece : int
@@ -121,4 +217,3 @@ class Square:
         return "Square[" + str(self.piece) + ", " + str(self.owner) + "]"
 
 Square.EMPTY = Square(None, None, None, None)
-
@@ -0,0 +1,43 @@
+import random
+
+SIDE_TO_MOVE = 0x9e3779b97f4a7c15
+
+class ZobristTable:
+    """Random 64-bit keys for every combination of square, piece id and owner on a board of given size
+
+    Keys are generated lazily, one row per (piece, owner) pair, from a seed derived from the board size and the pair,
+    so equal positions get equal keys in every process.
+
+    Attributes
+    ----------
+    size : int
+        number of squares on the board
+    rows : List[List[int]]
+        rows of keys indexed by square index, stored at index `(owner - 1) * 256 + piece`
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.rows = [None] * 512
+
+    def __reduce__(self):
+        return (table, (self.size,)) #keys are deterministic, unpickled boards share the table of their process
+
+    def row(self, piece, owner):
+        """Keys of a piece with given id, owned by player with given value, for all squares of the board"""
+        position = (owner - 1) * 256 + piece
+        row = self.rows[position]
+        if row is None:
+            generator = random.Random(self.size * 512 + position)
+            row = [generator.getrandbits(64) for _ in range(self.size)]
+            self.rows[position] = row
+        return row
+
+_tables = {}
+
+def table(size):
+    """Shared ZobristTable for boards with given number of squares"""
+    zobristTable = _tables.get(size)
+    if zobristTable is None:
+        zobristTable = _tables[size] = ZobristTable(size)
+    return zobristTable
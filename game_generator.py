@@ -4,22 +4,43 @@ from game_elements.board import Board
 from game_elements.player import Player
 from game_elements.piece import Piece
 from game_definitions.vector import Vector
+import os
 import random
 import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import utils
+import evaluator
 from generators import moveGenerator, boardGenerator
 from generators.winConditionGenerator import WinConditionGenerator
+from generators.duplicates import DuplicateIndex
+from game_definitions import batch_playout
 from mcts import mcts
-import yaml
 
-def mcts_playout(game):
-    game_state = game.initialState()
-    while(not game_state.finished):
-        if(game_state.currentPlayer == Player.P1):
-            move = random.choice(game_state.possibleMoves)
-            game_state = game_state.applyMove(move)
-        else:
-            game_state = mcts.findNextMove(game_state).game_state
+def mcts_playout(game, workers=1, timeLimit=1, iterations=None, parallel="root", policy=None):
+    """Plays a game of random player (P1) against MCTS (P2), searching with given number of processes (None for one per CPU)
+
+    Single process and leaf parallel searches keep their tree between moves (see MCTSSearcher).
+    """
+    workers = workers or os.cpu_count()
+    executor = None
+    if workers > 1:
+        executor = mcts.leafExecutor(game, workers, policy) if parallel == "leaf" else ProcessPoolExecutor(max_workers=workers)
+    searcher = None
+    if workers == 1 or parallel == "leaf":
+        searcher = mcts.MCTSSearcher(timeLimit, iterations, workers=workers, executor=executor, policy=policy)
+    try:
+        game_state = game.initialState()
+        while(not game_state.finished):
+            if(game_state.currentPlayer == Player.P1):
+                move = random.choice(game_state.possibleMoves)
+                game_state = game_state.applyMove(move)
+            elif searcher is not None:
+                game_state = searcher.findNextMove(game_state).game_state
+            else:
+                game_state = mcts.findNextMove(game_state, timeLimit, iterations, workers, parallel, executor, policy=policy).game_state
+    finally:
+        if executor is not None:
+            executor.shutdown()
     return game_state
 
 def randomBoardSize(n_pieces):
@@ -58,32 +79,113 @@ def controlledPlayout(game):
         for move in moves:
             moveablePiece = game_state.board[move.origin].piece
             moveablePieces.add(moveablePiece)
-        move = random.choice(game_state.possibleMoves)
-        game_state = game_state.applyMove(move)
+        game_state.make(random.choice(moves))
         turnCount += 1
     return game_state, turnCount, moveablePieces
 
+def playoutResults(game, n, batchSize=25):
+    """Yields (winner, turn count, moveable pieces) of n random playouts, played in batches by BatchPlayout whenever possible"""
+    engine = None
+    if batch_playout.available():
+        try:
+            engine = batch_playout.BatchPlayout(game)
+        except batch_playout.UnsupportedGame:
+            engine = None
+    played = 0
+    while played < n:
+        if engine is None:
+            game_state, turnCount, moveablePieces = controlledPlayout(game)
+            yield game_state.winner, turnCount, moveablePieces
+            played += 1
+            continue
+        batch = min(batchSize, n - played)
+        for result in engine.run(batch):
+            yield result
+        played += batch
+
 def testGame(game):
+    if evaluator.rejectionReasons(game): #cheap static checks first, see evaluator.rejectionReasons
+        return False
     wasWinner = False
     unmovedPieces = {a for a in range(1, len(game.piece_types[Player.P1]))}
-    for _ in range(50):
-        game_state, turnCount, movedPieces = controlledPlayout(game)
+    for winner, turnCount, movedPieces in playoutResults(game, 50):
         if turnCount < 10:
             return False
-        if game_state.winner:
+        if winner:
             wasWinner = True
         unmovedPieces = unmovedPieces - movedPieces
         if not unmovedPieces and wasWinner:
             return True
     return False
 
-def generatePlayable(outputDir="generated/games",n = 1000):
-    i = 0
-    while i < n:
-        game = generateGame()
-        res = testGame(game)
-        if(res):
-            if(i % (n // 10) == 0 ):
-                print(str((100 * i) / n) + "%")
-            utils.toFile(game, outputDir + "/game_" + str(i) + ".yml")
-            i += 1
\ No newline at end of file
+def generatePlayableGame(seed, duplicates=None):
+    """Generates candidate games with random module seeded with given seed until one of them passes testGame
+
+    Candidates that are near duplicates of games in the DuplicateIndex are skipped before any playouts.
+    State of the random module is restored afterwards, so callers in the same process keep their own sequence.
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        while True:
+            game = generateGame()
+            if duplicates is not None and duplicates.query(game.toDict()) is not None:
+                continue
+            if testGame(game):
+                return game
+    finally:
+        random.setstate(state)
+
+def _playableGameDict(seed, duplicates=None):
+    return generatePlayableGame(seed, duplicates).toDict()
+
+def _playableGames(n, seed, workers, duplicates=None):
+    """Yields (index, game dictionary) pairs of n playable games, game with index i is generated from seed + i
+
+    Games are sent back from the worker processes already converted to dictionaries, which keeps them identical to
+    the ones generated in a single process (unpickled sets of target squares could be iterated in a different order).
+    With a DuplicateIndex accepted games are added to it and duplicated candidates are skipped before testing them.
+    Workers of the pool get a copy of the index as it was when their task was submitted, so games arriving from them are checked
+    again against games accepted meanwhile and a duplicate is replaced by a game generated from the next unused seed (seed + n, ...).
+    """
+    if workers == 1:
+        for i in range(n):
+            gameDict = _playableGameDict(seed + i, duplicates)
+            if duplicates is not None:
+                duplicates.add(gameDict)
+            yield i, gameDict
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        submitted = 0
+        nextSeed = seed + n
+        while submitted < n or pending:
+            while submitted < n and len(pending) < 2 * workers:
+                pending[executor.submit(_playableGameDict, seed + submitted, duplicates)] = submitted
+                submitted += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, gameDict = pending.pop(future), future.result()
+                if duplicates is not None:
+                    if duplicates.query(gameDict) is not None:
+                        pending[executor.submit(_playableGameDict, nextSeed, duplicates)] = i
+                        nextSeed += 1
+                        continue
+                    duplicates.add(gameDict)
+                yield i, gameDict
+
+def generatePlayable(outputDir="generated/games",n = 1000, workers=1, seed=None, duplicateThreshold=0.9):
+    """Generates n playable games into files game_0.yml to game_<n-1>.yml of the output directory
+
+    With more than one worker games are generated by a pool of processes (None for one per CPU) and written in order of completion.
+    Every game is generated from its own seed, so without duplicates output for a given seed does not depend on number of workers.
+    Games whose estimated similarity to an already generated game reaches duplicateThreshold are replaced
+    (see generators.duplicates), None accepts all games.
+    """
+    seed = random.getrandbits(32) if seed is None else seed
+    duplicates = None if duplicateThreshold is None else DuplicateIndex(duplicateThreshold)
+    for count, (i, gameDict) in enumerate(_playableGames(n, seed, workers, duplicates)):
+        if(count % max(n // 10, 1) == 0 ):
+            print(str((100 * count) / n) + "%")
+        utils.toFile(gameDict, outputDir + "/game_" + str(i) + ".yml")
@@ -0,0 +1,127 @@
+import hashlib
+import random
+
+MIRROR = str.maketrans("LR", "RL")
+PRIME = (1 << 61) - 1
+
+def moveToken(moveDict):
+    """Move of a piece (see Piece.toDict) as a string, the same for the move and its mirror image"""
+    kind = next(key for key in ["hop", "slide", "leap"] if key in moveDict)
+    token = kind + " " + moveDict[kind] + (" attack" if moveDict.get("canAttack") else "") + ((" if " + moveDict["if"]) if "if" in moveDict else "")
+    return min(token, token.translate(MIRROR))
+
+def pieceTokens(pieceDicts):
+    """Piece id to its normalized moveset (sorted, without duplicated moves), which identifies the piece regardless of its id"""
+    tokens = {}
+    for pieceDict in pieceDicts:
+        (pieceId, definition), = pieceDict.items()
+        tokens[int(pieceId)] = "|".join(sorted({moveToken(move) for move in definition["moves"]}))
+    return tokens
+
+def conditionFeatures(conditionDict, pieces, width, mirrored):
+    """Structure of the win condition (with sorted operands) and set of its target squares"""
+    (kind, value), = conditionDict.items()
+    if kind in ["and", "or"]:
+        operands = [conditionFeatures(operand, pieces, width, mirrored) for operand in value]
+        return kind + "(" + ",".join(sorted(structure for structure, _ in operands)) + ")", set().union(*[targets for _, targets in operands])
+    if kind == "piecePlacedAt":
+        targets = set()
+        for y, row in value.items():
+            for x in str(row).split(","):
+                targets.add((width - 1 - int(x) if mirrored else int(x), int(y)))
+        return kind, targets
+    if kind == "EnemyPieceTypeRemoved":
+        return kind + " " + pieces.get(value, str(value)), set()
+    return kind + " " + str(value), set()
+
+def features(gameDict):
+    """Canonical set of features of a game definition (see BoardGame.toDict)
+
+    Piece ids are replaced by their movesets and the board is taken in whichever of its horizontal orientations gives
+    the smaller description, so games differing only by numbering of pieces, order or duplicates of moves,
+    order of win condition operands or a mirrored board get equal features.
+    """
+    width, height = [int(dimension) for dimension in gameDict["dimensions"].split("x")]
+    pieces = pieceTokens(gameDict["pieces"])
+    orientations = []
+    for mirrored in [False, True]:
+        squares = set()
+        for y, row in enumerate(gameDict["placement"].split(" ")):
+            for x, pieceId in enumerate(row):
+                if pieceId != "0":
+                    squares.add("at %d,%d %s" % (width - 1 - x if mirrored else x, y, pieces.get(int(pieceId), pieceId)))
+        structure, targets = conditionFeatures(gameDict["winConditions"], pieces, width, mirrored)
+        squares.update("target %d,%d" % target for target in targets)
+        squares.add("win " + structure)
+        orientations.append(sorted(squares))
+    result = set(min(orientations))
+    result.add("dimensions %dx%d" % (width, height))
+    result.add("player2mirrored %s" % gameDict["player2mirrored"])
+    for token in pieces.values():
+        result.add("piece " + token)
+        result.update("move " + move for move in token.split("|"))
+    return result
+
+def jaccard(featuresA, featuresB):
+    return len(featuresA & featuresB) / len(featuresA | featuresB) if featuresA or featuresB else 1.0
+
+class DuplicateIndex:
+    """Locality-sensitive hashing index of MinHash signatures of games, finding near duplicates without comparing all pairs
+
+    Signature of a game holds, for every of 'permutations' random hash functions, the smallest hash of its features,
+    two signatures agree on a position with probability equal to Jaccard similarity of the features.
+    Signatures are split into bands and games with an equal band land in the same bucket, so only games sharing
+    a bucket are compared. Games with estimated similarity of at least 'threshold' are duplicates.
+
+    Attributes
+    ----------
+    threshold : float
+        minimal estimated Jaccard similarity of features (see 'features') of duplicated games
+    bands : int
+        number of bands the signatures are split into, permutations // bands rows each
+    signatures : List[List[int]]
+        MinHash signatures of the added games, by their index
+    buckets : List[Dict[tuple, List[int]]]
+        for every band, indices of added games by values of their signatures in that band
+    """
+
+    def __init__(self, threshold=0.9, permutations=64, bands=8, seed=0):
+        generator = random.Random(seed)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.coefficients = [(generator.randrange(1, PRIME), generator.randrange(PRIME)) for _ in range(self.bands * self.rows)]
+        self.signatures = []
+        self.buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def signature(self, gameDict):
+        """MinHash signature of features of the game definition"""
+        hashes = [int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little") for feature in features(gameDict)]
+        return [min((a * value + b) % PRIME for value in hashes) for a, b in self.coefficients]
+
+    def bandKeys(self, signature):
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def query(self, gameDict, signature=None):
+        """Index of an added game that is a near duplicate of the game definition, None if there is none"""
+        signature = self.signature(gameDict) if signature is None else signature
+        candidates = set()
+        for buckets, key in zip(self.buckets, self.bandKeys(signature)):
+            candidates.update(buckets.get(key, ()))
+        for candidate in sorted(candidates):
+            other = self.signatures[candidate]
+            if sum(a == b for a, b in zip(signature, other)) / len(signature) >= self.threshold:
+                return candidate
+        return None
+
+    def add(self, gameDict, signature=None):
+        """Adds the game definition to the index, returns its index"""
+        signature = self.signature(gameDict) if signature is None else signature
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for buckets, key in zip(self.buckets, self.bandKeys(signature)):
+            buckets.setdefault(key, []).append(index)
+        return index
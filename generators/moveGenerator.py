@@ -14,8 +14,8 @@ class HopGenerator:
         y = distance - x
         x,y = x,  random.choice([-1,1]) * y
         can_attack = random.choice([True, False])
-
-        return Hop(Vector(x,y), can_attack, conditions), {(x,y)}
+        move = Hop(Vector(x,y), can_attack, conditions)
+        return move, moveDestinations(move)
 
 class LeapGenerator:
     @staticmethod
@@ -23,7 +23,8 @@ class LeapGenerator:
         condition = generateCondition() # TODO generate conditions method
         x,y = random.choice([(0,1),(1,0),(1,1)])
         x,y = x,  random.choice([-1,1]) * y
-        return Leap(Vector(x,y), condition=condition), {(x*2, y*2)}
+        move = Leap(Vector(x,y), condition=condition)
+        return move, moveDestinations(move)
 
 class SlideGenerator:
     @staticmethod
@@ -31,8 +32,30 @@ class SlideGenerator:
         condition = generateCondition() # TODO generate conditions method
         x,y = random.choice([(0,1),(1,0),(1,1)])
         x,y = x,  random.choice([-1,1]) * y
-        return Slide(Vector(x,y), condition=condition), {(x*n,y*n) for n in range(1,10)}
-        
+        move = Slide(Vector(x,y), condition=condition)
+        return move, moveDestinations(move)
+
+GENERATORS = [HopGenerator, LeapGenerator, SlideGenerator]
+WEIGHTS = [0.58, 0.28, 0.28]
+
+def moveDestinations(move):
+    """Squares, relative to the piece, that the move definition can reach"""
+    x, y = move.direction
+    if type(move) == Slide:
+        return {(x*n, y*n) for n in range(1,10)}
+    if type(move) == Leap:
+        return {(x*2, y*2)}
+    return {(x, y)}
+
+def generateMove(takenDestinations):
+    """Move of a randomly chosen kind, None if it reaches any of takenDestinations, which are extended by destinations of the move otherwise"""
+    generator = random.choices(GENERATORS, weights=WEIGHTS)[0]
+    move, destinations = generator.generateMove()
+    if (takenDestinations.intersection(destinations)):
+        return None
+    takenDestinations |= destinations
+    return move
+
 def generateCondition():
     if random.random() < 0.1:
         return SimpleMoveConditionGenerator().generateCondition()
@@ -42,12 +65,10 @@ def generateMoveSet():
     moves = []
     takenDestinations = set()
     for _ in range(random.randint(1, 5)):
-        generator = random.choices([HopGenerator, LeapGenerator, SlideGenerator], weights=[0.58, 0.28, 0.28])[0]
-        move,destinations = generator.generateMove()
-        if (takenDestinations.intersection(destinations)):
+        move = generateMove(takenDestinations)
+        if move is None:
             continue
         moves.append(move)
-        takenDestinations |= destinations
         if(move.direction.x != 0):
           moves.append(move.inverted(axis=0))
     return moves
\ No newline at end of file
@@ -28,7 +28,7 @@ class WinConditionGenerator:
         return EnemyPieceTypeRemoved(random.randint(1, self.n_pieceTypes))
 
     def totalPiecesLeft(self):
-        return EnemyTotalPiecesLeft(random.randint(1, (len(self.board.matrix)+1)//4))
+        return EnemyTotalPiecesLeft(random.randint(1, (self.board.countPieces()+1)//4))
        
     def generateRandomArea(self, symmetric=False):
         if symmetric:
@@ -1,39 +1,220 @@
+import time
 from game_elements.player import Player
 from game_definitions.heuristicValueEvaluator import HeuristicCalculator
+from mcts.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+MAX_DEPTH = 64
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time or node budget is exhausted"""
 
 class AlphaBeta:
-    def __init__(self, game):
+    """Minimax search with alpha-beta pruning, positive values favour player 2
+
+    Search walks a single copy of the game state, applying and reverting moves in place with GameState.make and GameState.unmake.
+    Results are kept in a transposition table shared between consecutive searches,
+    so positions reached by different move orders are searched only once.
+
+    'findBestMove' deepens the search one ply at a time, until it reaches the maximum depth or runs out of its time or node budget,
+    in which case the move found by the last completed iteration is played. Moves are searched in order:
+    best move from the previous iteration (or the transposition table), captures of the most valuable pieces, killer moves and finally
+    quiet moves sorted by history of the cutoffs they caused.
+
+    Leaves are evaluated with HeuristicCalculator, or with its IncrementalEvaluation updated along every applied and reverted move
+    when 'incremental' is set.
+
+    Attributes
+    ----------
+    depth : int
+        maximum number of plies searched by 'findBestMove', unlimited when a budget is given and depth is None
+    timeLimit : float
+        number of seconds a single 'findBestMove' call may take, None for no limit
+    nodeLimit : int
+        number of positions a single 'findBestMove' call may visit, None for no limit
+    incremental : bool
+        whether leaves are evaluated incrementally
+    table : TranspositionTable
+        results of already searched positions
+    nodes : int
+        number of positions visited by the last search
+    completedDepth : int
+        depth of the last fully completed iteration of the last search
+    """
+
+    def __init__(self, game, depth=3, tableSize=2**16, timeLimit=None, nodeLimit=None, incremental=True):
         self.heuristicCalc = HeuristicCalculator(game)
+        self.depth = depth
+        self.timeLimit = timeLimit
+        self.nodeLimit = nodeLimit
+        self.incremental = incremental
+        self.evaluation = None
+        self.table = TranspositionTable(tableSize)
+        self.history = {}
+        self.killers = []
+        self.nodes = 0
+        self.completedDepth = 0
+        self.deadline = None
+        self.maxNodes = None
+
+    def findBestMove(self, game_state, timeLimit=None, nodeLimit=None):
+        timeLimit = self.timeLimit if timeLimit is None else timeLimit
+        nodeLimit = self.nodeLimit if nodeLimit is None else nodeLimit
+        maxDepth = self.depth
+        if maxDepth is None:
+            maxDepth = MAX_DEPTH if (timeLimit or nodeLimit) else 3
+        state = game_state.copy()
+        maximizePlayer2 = state.currentPlayer == Player.P2
+        self.prepareSearch()
+        if self.incremental:
+            self.evaluation = self.heuristicCalc.incremental(state)
+        started = time.time()
+        bestMove = None
+        for depth in range(1, maxDepth + 1):
+            if depth > 1: #first iteration is never interrupted, so there is always a move to play
+                self.deadline = None if timeLimit is None else started + timeLimit
+                self.maxNodes = nodeLimit
+            try:
+                value, move = self.alphaBeta(state, maximizePlayer2, -5000, 5000, depth)
+            except SearchTimeout:
+                break
+            bestMove = move
+            self.completedDepth = depth
+            if bestMove is None or abs(value) >= 2000:
+                break
+        self.deadline = None
+        self.maxNodes = None
+        self.evaluation = None
+        if bestMove is None:
+            return None
+        return game_state.applyMove(bestMove)
+
+    def prepareSearch(self):
+        self.nodes = 0
+        self.completedDepth = 0
+        self.deadline = None
+        self.maxNodes = None
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+        self.history = { move: value // 2 for move, value in self.history.items() if value > 1 }
+        self.table.newSearch()
+
+    def evaluate(self, game_state):
+        if self.evaluation is not None:
+            value = self.evaluation.calculate()
+        else:
+            value = self.heuristicCalc.calculate(game_state)
+        return value[1] - value[0]
 
-    def findBestMove(self, game_state):
-        maximizePlayer1 = game_state.currentPlayer == Player.P1
-        return self.alphaBeta(game_state, maximizePlayer1, -5000, 5000, 3)[1]
+    def make(self, game_state, move):
+        record = game_state.make(move)
+        if self.evaluation is not None:
+            self.evaluation.update(record)
+        return record
 
-    def alphaBeta(self, game_state, ismin, alpha, beta, depth):
+    def unmake(self, game_state, record):
+        game_state.unmake(record)
+        if self.evaluation is not None:
+            self.evaluation.update(record)
+
+    def checkBudget(self):
+        if self.maxNodes is not None and self.nodes > self.maxNodes:
+            raise SearchTimeout()
+        if self.deadline is not None and (self.nodes & 63) == 0 and time.time() > self.deadline:
+            raise SearchTimeout()
+
+    def orderMoves(self, game_state, moves, bestIndex, ply):
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        pieceValues = self.heuristicCalc.pieceTypesEvaluated
+        board = game_state.board
+        def score(index):
+            if index == bestIndex:
+                return 1e9
+            move = moves[index]
+            if move.capture is not None:
+                return 1e6 + pieceValues.get(board.pieces[board.index(move.capture)], 0)
+            key = (move.origin, move.destination)
+            if key in killers:
+                return 1e5
+            return self.history.get(key, 0)
+        return sorted(range(len(moves)), key=score, reverse=True)
+
+    def storeCutoff(self, move, depth, ply):
+        if move.capture is not None:
+            return
+        key = (move.origin, move.destination)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+        if ply < len(self.killers):
+            killers = self.killers[ply]
+            if killers[0] != key:
+                killers[1] = killers[0]
+                killers[0] = key
+
+    def alphaBeta(self, game_state, maximizing, alpha, beta, depth, ply=0):
+        self.nodes += 1
+        self.checkBudget()
+        winner = game_state.winner
+        if(winner is not None):
+            return (2000, None) if (winner == Player.P2) else (-2000, None)
+        key = game_state.key
+        entry = self.table.lookup(key)
+        bestIndex = None
+        if entry is not None:
+            _, value, entryDepth, flag, bestIndex, _ = entry
+            if entryDepth >= depth and ply > 0:
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if flag == EXACT or alpha >= beta:
+                    if bestIndex is None:
+                        return value, None
+                    moves = game_state.possibleMoves
+                    if bestIndex < len(moves):
+                        return value, moves[bestIndex]
         if (depth == 0):
-            value = self.heuristicCalc.calculate(game_state) 
-            return value[1] - value[0],game_state
-        if(game_state.winner is not None):
-            return (2000,game_state) if (game_state.winner == Player.P2) else (-2000, game_state)
-        retstate = None
-        if(ismin):
-            mval = 999999
-            for state in game_state.possibleStates:
-                beta, _ = self.alphaBeta(state, True, alpha, beta, depth - 1)
-                if(beta < mval):
-                    mval = beta
-                    retstate = state
+            value = self.evaluate(game_state)
+            self.table.store(key, value, 0, EXACT, None)
+            return value, None
+        moves = game_state.possibleMoves
+        if not moves:
+            value = self.evaluate(game_state)
+            self.table.store(key, value, depth, EXACT, None)
+            return value, None
+        if bestIndex is not None and bestIndex >= len(moves):
+            bestIndex = None
+        order = self.orderMoves(game_state, moves, bestIndex, ply)
+        alphaOrig, betaOrig = alpha, beta
+        bestIndex = None
+        if(maximizing):
+            mval = -999999
+            for index in order:
+                record = self.make(game_state, moves[index])
+                value, _ = self.alphaBeta(game_state, False, alpha, beta, depth - 1, ply + 1)
+                self.unmake(game_state, record)
+                if(value > mval):
+                    mval = value
+                    bestIndex = index
+                alpha = max(alpha, mval)
                 if(alpha >= beta):
+                    self.storeCutoff(moves[index], depth, ply)
                     break
-            return beta, retstate
         else:
-            mval = -999999
-            for state in game_state.possibleStates:
-                alpha, _ = self.alphaBeta(state, False, alpha, beta, depth - 1)
-                if(alpha > mval):
-                    mval = alpha
-                    retstate = state
+            mval = 999999
+            for index in order:
+                record = self.make(game_state, moves[index])
+                value, _ = self.alphaBeta(game_state, True, alpha, beta, depth - 1, ply + 1)
+                self.unmake(game_state, record)
+                if(value < mval):
+                    mval = value
+                    bestIndex = index
+                beta = min(beta, mval)
                 if(alpha >= beta):
+                    self.storeCutoff(moves[index], depth, ply)
                     break
-            return alpha, retstate
-
+        if mval <= alphaOrig:
+            flag = UPPER
+        elif mval >= betaOrig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, mval, depth, flag, bestIndex)
+        return mval, moves[bestIndex]
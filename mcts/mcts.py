@@ -1,9 +1,18 @@
 import random
-import sys
-import math
 import time
+from concurrent.futures import ProcessPoolExecutor
+from mcts.tree import SearchTree
+from mcts.playouts import RandomPlayout
+
+_leafGame = None
+_leafPolicy = None
+_leafStateClass = None
 
 class UCTNode():
+    """Result of a search: a child of the searched state with its statistics, see treeNode
+
+    Searches themselves run on SearchTree, nodes are only built for the returned move.
+    """
     def __init__(self, game_state, parent=None):
         self.game_state = game_state
         self.parent = parent
@@ -11,64 +20,164 @@ class UCTNode():
         self.total_value = 0
         self.number_visits = 0
 
-    def best_move(self):
-        return max(self.children,
-                key=lambda node: node.number_visits)
-
-    def uctValue(self):
-            if self.number_visits == 0:
-                return sys.maxsize
-            return ((self.total_value * 1.0) / self.number_visits) + (1.41 * math.sqrt(math.log(self.parent.number_visits) / self.number_visits))
-
-    def best_child(self):
-        return max(self.children,
-                key=lambda node: node.uctValue())
-
-    def select_leaf(self):
-        current = self
-        while len(current.children) != 0:
-            current = current.best_child()
-        return current
-
-    def simulateRandomPlayout(self, player):
-        if(self.game_state.winner == ~player):
-            self.parent.total_value = -999999
-            return self.game_state.winner
-        game_state = self.game_state.copy()
-        while not game_state.finished:
-            game_state._possibleMoves = None
-            moves = game_state.possibleMoves
-            moveInfo = random.choice(moves)
-            game_state = game_state.applyMove(moveInfo)
-        return game_state.winner
-
-    def expand_node(self):
-        for state in self.game_state.possibleStates:
-            newNode = UCTNode(state, parent=self)
-            self.children.append(newNode)
-
-    def backup(self, winner, player):
-        current = self
-        while current is not None:
-            current.number_visits += 1
-            if winner == player:
-                current.total_value += 1
-            current = current.parent
-
-def findNextMove(state):
-    rootNode = UCTNode(state)
-    t_end = time.time() + 1
+def treeNode(tree, child):
+    """UCTNode of a child of the tree's root, holding its state and statistics"""
+    rootNode = UCTNode(tree.state)
+    rootNode.number_visits = tree.visits[0]
+    node = UCTNode(tree.state.applyMove(tree.moveOf(child)), parent=rootNode)
+    node.number_visits = tree.visits[child]
+    node.total_value = tree.values[child]
+    rootNode.children.append(node)
+    return node
+
+def _rootSearch(state, timeLimit, iterations, memoryLimit, policy, seed):
+    """Builds an independent tree in a worker process, returns (visits, total value) of root's children"""
+    random.seed(seed)
+    tree = SearchTree(state, memoryLimit, policy)
+    tree.search(timeLimit, iterations)
+    return [(tree.visits[child], tree.values[child]) for child in tree.children()]
+
+def _initLeafWorker(game, policy):
+    """Keeps the game and playout policy in a worker process, so leaf tasks only carry the board"""
+    global _leafGame, _leafPolicy, _leafStateClass
+    _leafGame = game
+    _leafPolicy = policy if policy is not None else RandomPlayout()
+    _leafStateClass = type(game.initialState())
+
+def leafExecutor(game, workers, policy=None):
+    """Pool of processes for leaf parallelization of searches in the game, see leafParallelSearch"""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_initLeafWorker, initargs=(game, policy))
+
+def _leafPlayouts(board, currentPlayer, round_count, player, playouts, seed):
+    """Plays playouts from a leaf in a worker process set up by leafExecutor, returns list of their rewards"""
+    random.seed(seed)
+    state = _leafStateClass(_leafGame, board, currentPlayer, round_count)
+    state.board.game = _leafGame
+    return [_leafPolicy.play(state.copy(), player) for _ in range(playouts)]
+
+def rootParallelSearch(state, executor, workers, timeLimit=1, iterations=None, memoryLimit=None, policy=None):
+    """Root parallelization: every worker builds its own tree from the state (budgets apply per worker), visits of root's children are summed"""
+    seeds = [random.getrandbits(64) for _ in range(workers)]
+    results = executor.map(_rootSearch, [state] * workers, [timeLimit] * workers, [iterations] * workers, [memoryLimit] * workers, [policy] * workers, seeds)
+    tree = SearchTree(state)
+    tree.expand(0, tree.state)
+    for childResults in results:
+        for child, (visits, value) in zip(tree.children(), childResults):
+            tree.visits[child] += visits
+            tree.values[child] += value
+            tree.visits[0] += visits
+    return tree
+
+def leafParallelSearch(state, executor, workers, timeLimit=1, iterations=None, memoryLimit=None, policy=None, playouts=4):
+    """Leaf parallelization: a single tree, every selected leaf is evaluated by a batch of playouts spread across the workers
+
+    The executor has to be made by leafExecutor for the game and policy of the search, tasks send only the leaf's board.
+    """
+    tree = SearchTree(state, memoryLimit, policy)
+    leafParallelIterations(tree, executor, workers, timeLimit, iterations, playouts)
+    return tree
+
+def leafParallelIterations(tree, executor, workers, timeLimit=1, iterations=None, playouts=4):
+    t_end = None if timeLimit is None else time.time() + timeLimit
+    records = []
     n = 0
-    while time.time() < t_end:
-        promisingNode = rootNode.select_leaf()
-        if promisingNode.game_state.finished == False :
-            promisingNode.expand_node()
-        nodeToExplore = promisingNode
-        if len(promisingNode.children) > 0:
-            nodeToExplore = random.choice(promisingNode.children)
-
-        winner = nodeToExplore.simulateRandomPlayout(state.currentPlayer)
-        nodeToExplore.backup(winner, state.currentPlayer)
+    while (iterations is None or n < iterations) and (t_end is None or time.time() < t_end):
+        node = tree.descend(records)
+        if tree.state.finished:
+            rewards = [tree.simulate(node)]
+        else:
+            seeds = [random.getrandbits(64) for _ in range(workers)]
+            board = tree.state.board.__copy__()
+            board.game = None #the workers have their own game, see leafExecutor
+            batches = executor.map(_leafPlayouts, [board] * workers, [tree.state.currentPlayer] * workers, [tree.state.round_count] * workers,
+                                   [tree.player] * workers, [playouts] * workers, seeds)
+            rewards = [reward for batch in batches for reward in batch]
+        tree.restore(records)
+        for reward in rewards:
+            tree.backup(node, reward)
         n += 1
-    winnerNode = rootNode.best_move()
-    return winnerNode
\ No newline at end of file
+    return n
+
+def findNextMove(state, timeLimit=1, iterations=None, workers=1, parallel="root", executor=None, memoryLimit=None, policy=None):
+    """Returns the most visited child node of the state after searching for timeLimit seconds or given number of iterations
+
+    The search tree (see SearchTree) stops growing once its nodes take memoryLimit bytes.
+    Leaves are evaluated with playouts of given policy (see mcts.playouts), uniformly random ones by default.
+    With more than one worker the search is parallelized across processes, either at the root ("root") or at the leaves ("leaf").
+    An executor (e.g. concurrent.futures.ProcessPoolExecutor) can be passed to reuse the same pool of processes between calls,
+    leaf parallelization needs one made by leafExecutor.
+    """
+    if workers == 1:
+        tree = SearchTree(state, memoryLimit, policy)
+        tree.search(timeLimit, iterations)
+    elif executor is None:
+        with (leafExecutor(state.game, workers, policy) if parallel == "leaf" else ProcessPoolExecutor(max_workers=workers)) as executor:
+            return findNextMove(state, timeLimit, iterations, workers, parallel, executor, memoryLimit, policy)
+    elif parallel == "root":
+        tree = rootParallelSearch(state, executor, workers, timeLimit, iterations, memoryLimit, policy)
+    elif parallel == "leaf":
+        tree = leafParallelSearch(state, executor, workers, timeLimit, iterations, memoryLimit, policy)
+    else:
+        raise ValueError("Unknown parallelization: " + str(parallel))
+    return treeNode(tree, tree.bestChild())
+
+class MCTSSearcher:
+    """MCTS player keeping its search tree between consecutive moves
+
+    After a move is played, by the searcher or its opponent, the tree is re-rooted onto the subtree of the new state
+    (see SearchTree.reroot), so statistics gathered for it during previous searches are reused. The tree is rebuilt
+    when the new state cannot be found in it. With more than one worker the searcher uses leaf parallelization.
+
+    Attributes
+    ----------
+    timeLimit : float
+        number of seconds a single search may take, None for no limit
+    iterations : int
+        number of iterations of a single search, None for no limit
+    memoryLimit : int
+        number of bytes the tree's nodes may take, None for no limit
+    workers : int
+        number of processes evaluating playouts of selected leaves
+    executor : ProcessPoolExecutor
+        pool of the processes made by leafExecutor, None to start a new pool for every search
+    policy : RandomPlayout
+        policy of the playouts, see mcts.playouts
+    tree : SearchTree
+        tree of the last search, None before the first one
+    """
+
+    def __init__(self, timeLimit=1, iterations=None, memoryLimit=None, workers=1, executor=None, policy=None):
+        self.timeLimit = timeLimit
+        self.policy = policy
+        self.iterations = iterations
+        self.memoryLimit = memoryLimit
+        self.workers = workers
+        self.executor = executor
+        self.tree = None
+
+    def advance(self, state):
+        """Re-roots the tree onto given state, returns whether any statistics were kept"""
+        path = None
+        if self.tree is not None and self.tree.player == state.currentPlayer:
+            path = self.tree.find(state)
+        if path is None:
+            self.tree = SearchTree(state, self.memoryLimit, self.policy)
+            return False
+        self.tree.reroot(path)
+        return True
+
+    def findNextMove(self, state):
+        """Returns the most visited child node of the state, see findNextMove"""
+        self.advance(state)
+        tree = self.tree
+        if self.workers == 1:
+            tree.search(self.timeLimit, self.iterations)
+        elif self.executor is None:
+            with leafExecutor(state.game, self.workers, self.policy) as executor:
+                leafParallelIterations(tree, executor, self.workers, self.timeLimit, self.iterations)
+        else:
+            leafParallelIterations(tree, self.executor, self.workers, self.timeLimit, self.iterations)
+        child = tree.bestChild()
+        node = treeNode(tree, child)
+        tree.reroot([child])
+        return node
@@ -0,0 +1,91 @@
+import math
+import random
+from game_definitions.heuristicValueEvaluator import HeuristicCalculator
+
+class RandomPlayout:
+    """Playout policy playing uniformly random moves
+
+    'play' returns reward of the playout for given player: 1 for a win and 0 otherwise.
+    With a cutoff the playout stops after that many plies and the reward is estimated from values of HeuristicCalculator,
+    mapped to (0, 1) with a logistic function.
+
+    Attributes
+    ----------
+    game : BoardGame
+        game the heuristic is prepared for, required only with a cutoff or by heuristic policies
+    cutoff : int
+        maximum number of plies of a playout, None to play until the game is finished
+    scale : float
+        difference of heuristic values that makes the estimated reward about 0.73
+    """
+
+    def __init__(self, game=None, cutoff=None, scale=20):
+        if cutoff is not None and game is None:
+            raise ValueError("Cut-off playouts need a game to prepare the heuristic for")
+        self.game = game
+        self.cutoff = cutoff
+        self.scale = scale
+        self._heuristicCalc = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_heuristicCalc"] = None #prepared evaluators are closures, they are rebuilt after unpickling
+        return state
+
+    @property
+    def heuristicCalc(self):
+        if self._heuristicCalc is None:
+            self._heuristicCalc = HeuristicCalculator(self.game)
+        return self._heuristicCalc
+
+    def chooseMove(self, game_state, moves):
+        return random.choice(moves)
+
+    def play(self, game_state, player):
+        """Plays the game state (modifying it) until the end or the cutoff, returns reward for the player"""
+        plies = 0
+        while not game_state.finished:
+            if self.cutoff is not None and plies >= self.cutoff:
+                return self.estimate(game_state, player)
+            game_state.make(self.chooseMove(game_state, game_state.possibleMoves))
+            plies += 1
+        return 1.0 if game_state.winner == player else 0.0
+
+    def estimate(self, game_state, player):
+        values = self.heuristicCalc.calculate(game_state)
+        difference = values[player.value - 1] - values[(~player).value - 1]
+        return 1 / (1 + math.exp(-difference / self.scale))
+
+class CapturePlayout(RandomPlayout):
+    """Light playout policy playing a random capture whenever there is one, a random move otherwise"""
+
+    def chooseMove(self, game_state, moves):
+        captures = [move for move in moves if move.capture is not None]
+        return random.choice(captures if captures else moves)
+
+class EpsilonGreedyPlayout(RandomPlayout):
+    """Playout policy playing a random move with probability epsilon and the move with the best heuristic value otherwise
+
+    Attributes
+    ----------
+    epsilon : float
+        probability of playing a random move
+    """
+
+    def __init__(self, game, epsilon=0.1, cutoff=None, scale=20):
+        super().__init__(game, cutoff, scale)
+        self.epsilon = epsilon
+
+    def chooseMove(self, game_state, moves):
+        if random.random() < self.epsilon:
+            return random.choice(moves)
+        player = game_state.currentPlayer
+        best, bestValue = None, None
+        for move in moves:
+            record = game_state.make(move)
+            values = self.heuristicCalc.calculate(game_state)
+            game_state.unmake(record)
+            value = values[player.value - 1] - values[(~player).value - 1]
+            if bestValue is None or value > bestValue:
+                best, bestValue = move, value
+        return best
@@ -0,0 +1,44 @@
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable:
+    """Fixed-size table of search results, indexed by Zobrist key of a game state (see GameState.key)
+
+    Every slot holds a single entry, a tuple of (key, value, depth, flag, bestMove, age), where flag tells whether
+    the value is exact or only a lower/upper bound and bestMove is an index into possibleMoves of the stored state.
+    An entry is replaced by a result for another state when it comes from an older search or from a search that was not deeper.
+
+    Attributes
+    ----------
+    size : int
+        maximum number of entries kept in the table
+    age : int
+        number of the current search, incremented with 'newSearch'
+    """
+
+    def __init__(self, size=2**16):
+        self.size = size
+        self.entries = [None] * size
+        self.age = 0
+        self.hits = 0
+
+    def newSearch(self):
+        self.age += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.hits = 0
+
+    def lookup(self, key):
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, value, depth, flag, bestMove):
+        slot = key % self.size
+        entry = self.entries[slot]
+        if entry is None or entry[0] == key or entry[5] != self.age or depth >= entry[2]:
+            self.entries[slot] = (key, value, depth, flag, bestMove, self.age)
@@ -0,0 +1,201 @@
+import math
+import random
+import sys
+import time
+from array import array
+from mcts.playouts import RandomPlayout
+
+class SearchTree:
+    """Monte Carlo search tree stored in parallel arrays instead of node objects
+
+    Node 0 is the root, children of a node occupy a contiguous block of indices starting at firstChild,
+    ordered like possibleMoves of the node's state, so a child's move is possibleMoves[child - firstChild[parent]].
+    Game states are not stored in the tree: every iteration descends from a single working copy of the root state,
+    applying moves with GameState.make and reverting them with GameState.unmake afterwards.
+
+    Values are counted from the point of view of the player the tree was built for, like in UCTNode,
+    as sums of rewards returned by the playout policy (see mcts.playouts).
+
+    Attributes
+    ----------
+    state : GameState
+        state of the root node
+    player : Player
+        player the tree searches a move for
+    policy : RandomPlayout
+        policy of the playouts simulated from the leaves
+    maxNodes : int
+        maximum number of nodes the tree can grow to, None for no limit; leaves other than the root are no longer expanded once it is reached
+    parent, firstChild, childCount, visits : array
+        parent index, index of the first child, number of children and number of visits of every node
+    values : array
+        total value of playouts that went through every node
+    """
+
+    NODE_BYTES = 4 * 4 + 8
+
+    def __init__(self, state, memoryLimit=None, policy=None):
+        self.state = state.copy()
+        self.player = state.currentPlayer
+        self.policy = policy if policy is not None else RandomPlayout()
+        self.maxNodes = None if memoryLimit is None else max(memoryLimit // self.NODE_BYTES, 1)
+        self.parent = array('i', [-1])
+        self.firstChild = array('i', [0])
+        self.childCount = array('i', [0])
+        self.visits = array('i', [0])
+        self.values = array('d', [0.0])
+
+    def __len__(self):
+        return len(self.visits)
+
+    @property
+    def memoryUsed(self):
+        """Number of bytes taken by statistics of the nodes"""
+        return len(self) * self.NODE_BYTES
+
+    def bestUCTChild(self, node):
+        """Child with the highest UCT value, an unvisited child if there is one"""
+        first = self.firstChild[node]
+        visits, values = self.visits, self.values
+        logVisits = math.log(visits[node])
+        best, bestValue = first, -sys.maxsize
+        for child in range(first, first + self.childCount[node]):
+            childVisits = visits[child]
+            if childVisits == 0:
+                return child
+            value = (values[child] / childVisits) + (1.41 * math.sqrt(logVisits / childVisits))
+            if value > bestValue:
+                best, bestValue = child, value
+        return best
+
+    def select(self, state, records):
+        """Descends from the root to a leaf, applying moves to the state and collecting their undo records, returns the leaf"""
+        node = 0
+        while self.childCount[node]:
+            child = self.bestUCTChild(node)
+            records.append(state.make(state.possibleMoves[child - self.firstChild[node]]))
+            node = child
+        return node
+
+    def expand(self, node, state):
+        """Adds children for all moves of the node's state, unless the state is terminal or the node limit is reached
+
+        The root is expanded regardless of the limit, so a search always has a move to return.
+        """
+        if state.finished:
+            return False
+        count = len(state.possibleMoves)
+        first = len(self)
+        if node and self.maxNodes is not None and first + count > self.maxNodes:
+            return False
+        self.firstChild[node] = first
+        self.childCount[node] = count
+        self.parent.extend([node] * count)
+        self.firstChild.extend([0] * count)
+        self.childCount.extend([0] * count)
+        self.visits.extend([0] * count)
+        self.values.extend([0.0] * count)
+        return True
+
+    def descend(self, records):
+        """Selects a leaf, expands it and moves to its random child, returns the node to simulate a playout from"""
+        state = self.state
+        node = self.select(state, records)
+        if self.expand(node, state):
+            child = self.firstChild[node] + random.randrange(self.childCount[node])
+            records.append(state.make(state.possibleMoves[child - self.firstChild[node]]))
+            node = child
+        return node
+
+    def restore(self, records):
+        while records:
+            self.state.unmake(records.pop())
+
+    def simulate(self, node):
+        """Plays a playout from the current state of the descent, returns its reward"""
+        winner = self.state.winner
+        if winner == ~self.player:
+            if node:
+                self.values[self.parent[node]] = -999999
+            return 0.0
+        return self.policy.play(self.state.copy(), self.player)
+
+    def backup(self, node, reward):
+        visits, values, parent = self.visits, self.values, self.parent
+        while node >= 0:
+            visits[node] += 1
+            values[node] += reward
+            node = parent[node]
+
+    def search(self, timeLimit=1, iterations=None):
+        """Runs iterations until the time limit (in seconds), number of iterations or the node limit is reached, returns number of iterations"""
+        t_end = None if timeLimit is None else time.time() + timeLimit
+        records = []
+        n = 0
+        while (iterations is None or n < iterations) and (t_end is None or time.time() < t_end):
+            node = self.descend(records)
+            reward = self.simulate(node)
+            self.restore(records)
+            self.backup(node, reward)
+            n += 1
+        return n
+
+    def find(self, state, maxDepth=2):
+        """Path of nodes (excluding the root) leading from the root to a node with given state, None if there is no such node within maxDepth plies"""
+        if self.state == state:
+            return []
+        if maxDepth == 0:
+            return None
+        return self._find(0, state, maxDepth)
+
+    def _find(self, node, state, maxDepth):
+        first = self.firstChild[node]
+        for child in range(first, first + self.childCount[node]):
+            record = self.state.make(self.state.possibleMoves[child - first])
+            try:
+                if self.state == state:
+                    return [child]
+                if maxDepth > 1 and self.childCount[child]:
+                    path = self._find(child, state, maxDepth - 1)
+                    if path is not None:
+                        return [child] + path
+            finally:
+                self.state.unmake(record)
+        return None
+
+    def reroot(self, path):
+        """Makes the last node of the path (see 'find') the new root, keeping statistics of its subtree and discarding the rest of the tree"""
+        node = 0
+        for child in path:
+            self.state.make(self.state.possibleMoves[child - self.firstChild[node]])
+            node = child
+        if not path:
+            return
+        parent, firstChild, childCount = array('i', [-1]), array('i', [0]), array('i', [self.childCount[node]])
+        visits, values = array('i', [self.visits[node]]), array('d', [self.values[node]])
+        queue = [(node, 0)]
+        for old, new in queue:
+            count = self.childCount[old]
+            if not count:
+                continue
+            first = self.firstChild[old]
+            firstChild[new] = len(visits)
+            for child in range(first, first + count):
+                queue.append((child, len(visits)))
+                parent.append(new)
+                firstChild.append(0)
+                childCount.append(self.childCount[child])
+                visits.append(self.visits[child])
+                values.append(self.values[child])
+        self.parent, self.firstChild, self.childCount, self.visits, self.values = parent, firstChild, childCount, visits, values
+
+    def children(self, node=0):
+        return range(self.firstChild[node], self.firstChild[node] + self.childCount[node])
+
+    def bestChild(self):
+        """Most visited child of the root"""
+        return max(self.children(), key=lambda child: self.visits[child])
+
+    def moveOf(self, child):
+        """Move of the root's state leading to given child of the root"""
+        return self.state.possibleMoves[child - self.firstChild[0]]
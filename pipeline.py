@@ -0,0 +1,198 @@
+"""Streaming evaluation of a corpus of game files, see 'python pipeline.py --help'
+
+Every game file goes through stages (load, static checks, playouts, metrics) in a pool of worker processes
+and its result is appended as one JSON line to the output file as soon as it is ready.
+Games already present in the output are skipped, so an interrupted run continues where it stopped.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import zlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import utils
+import evaluator
+import game_generator
+from game_elements.player import Player
+
+class StaticChecks:
+    """Rejects games that cannot be played at all before any playouts are run, see evaluator.rejectionReasons
+
+    Attributes
+    ----------
+    oneSided : bool
+        whether games that only one of the players can win are rejected too
+    """
+
+    def __init__(self, oneSided=False):
+        self.oneSided = oneSided
+
+    def __call__(self, game, result):
+        reasons = evaluator.rejectionReasons(game, self.oneSided)
+        if reasons:
+            result["reason"] = "; ".join(reasons)
+            return False
+        return True
+
+class Playouts:
+    """Plays random playouts of the game (see game_generator.playoutResults), keeping their outcomes in the result
+
+    Attributes
+    ----------
+    n : int
+        number of playouts per game
+    """
+
+    def __init__(self, n=20):
+        self.n = n
+
+    def __call__(self, game, result):
+        playouts = []
+        for winner, turnCount, movedPieces in game_generator.playoutResults(game, self.n):
+            playouts.append((None if winner is None else winner.value, turnCount, sorted(movedPieces)))
+        result["playouts"] = playouts
+        return True
+
+class Metrics:
+    """Summarizes outcomes of the playouts, replacing them in the result unless 'keepPlayouts' is set"""
+
+    def __init__(self, keepPlayouts=False):
+        self.keepPlayouts = keepPlayouts
+
+    def __call__(self, game, result):
+        playouts = result["playouts"] if self.keepPlayouts else result.pop("playouts")
+        lengths = [turnCount for _, turnCount, _ in playouts]
+        winners = [winner for winner, _, _ in playouts]
+        pieceTypes = len(game.piece_types[Player.P1]) - 1
+        movedTypes = set()
+        for _, _, movedPieces in playouts:
+            movedTypes.update(movedPieces)
+        result.update({
+            "p1_wins": winners.count(Player.P1.value) / len(playouts),
+            "p2_wins": winners.count(Player.P2.value) / len(playouts),
+            "draws": winners.count(None) / len(playouts),
+            "mean_length": statistics.mean(lengths),
+            "median_length": statistics.median(lengths),
+            "max_length": max(lengths),
+            "moved_piece_types": len(movedTypes) / pieceTypes if pieceTypes else 0.0,
+        })
+        return True
+
+def defaultStages(playouts=20, oneSided=False):
+    return [StaticChecks(oneSided), Playouts(playouts), Metrics()]
+
+def evaluateFile(path, name, stages, seed, cacheDir=None):
+    """Runs stages on the game loaded from the file, returns its JSON serializable result
+
+    Status of the result is "ok" when all stages passed, "rejected" when one of them returned False (with its reason)
+    and "error" when loading or any stage raised. Random module is seeded from the seed and name of the game,
+    so results do not depend on the order in which games are evaluated.
+    """
+    result = { "game": name }
+    try:
+        random.seed(seed ^ zlib.crc32(name.encode()))
+        game = utils.fromFile(path, cacheDir)
+        for stage in stages:
+            if not stage(game, result):
+                result["status"] = "rejected"
+                result.setdefault("stage", type(stage).__name__)
+                return result
+    except Exception as error:
+        result["status"] = "error"
+        result["reason"] = type(error).__name__ + ": " + str(error)
+        return result
+    result["status"] = "ok"
+    return result
+
+def completedGames(outputPath, retryErrors=False):
+    """Names of games with results in the output file, a partially written last line left by a crash is truncated
+
+    Lines that cannot be parsed are skipped with a warning, with retryErrors games whose result is an error are not completed.
+    """
+    completed = set()
+    if not os.path.exists(outputPath):
+        return completed
+    validEnd = 0
+    with open(outputPath, "rb") as outputFile:
+        for number, line in enumerate(outputFile, 1):
+            if not line.endswith(b"\n"):
+                break
+            validEnd += len(line)
+            try:
+                result = json.loads(line)
+                game = result["game"]
+            except (ValueError, KeyError, TypeError):
+                print("Skipping unreadable line %d of %s" % (number, outputPath))
+                continue
+            if retryErrors and result.get("status") == "error":
+                completed.discard(game)
+            else:
+                completed.add(game)
+    if validEnd < os.path.getsize(outputPath):
+        with open(outputPath, "r+b") as outputFile:
+            outputFile.truncate(validEnd)
+    return completed
+
+def _results(tasks, stages, seed, cacheDir, workers):
+    """Yields results of (path, name) tasks in order of completion, keeping at most 2 * workers games in flight"""
+    if workers == 1:
+        for path, name in tasks:
+            yield evaluateFile(path, name, stages, seed, cacheDir)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = iter(tasks)
+        pending = set()
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < 2 * workers:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(evaluateFile, task[0], task[1], stages, seed, cacheDir))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def runPipeline(paths, outputPath, stages=None, workers=None, seed=0, cacheDir=None, root=None, retryErrors=False):
+    """Evaluates game files with given paths, appending results to the JSONL output file, returns number of newly evaluated games
+
+    Games are identified by their paths relative to root (common directory of the paths by default),
+    games whose results are already in the output are skipped. With retryErrors games whose last result is an error
+    are evaluated again, their new result is appended after the old one.
+    """
+    stages = defaultStages() if stages is None else stages
+    workers = workers or os.cpu_count()
+    paths = sorted(paths)
+    if root is None:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else "."
+    completed = completedGames(outputPath, retryErrors)
+    tasks = [(path, os.path.relpath(os.path.abspath(path), root)) for path in paths]
+    tasks = [(path, name) for path, name in tasks if name not in completed]
+    count = 0
+    with open(outputPath, "a") as outputFile:
+        for result in _results(tasks, stages, seed, cacheDir, workers):
+            outputFile.write(json.dumps(result) + "\n")
+            outputFile.flush()
+            count += 1
+            if count % max(len(tasks) // 10, 1) == 0:
+                print(str((100 * count) // len(tasks)) + "%")
+    return count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluates all games of a directory, appending results to a JSONL file and resuming interrupted runs")
+    parser.add_argument("directory", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "games", "generated"))
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--playouts", type=int, default=20, help="random playouts per game")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, one per CPU by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reject-one-sided", action="store_true", help="reject games that only one of the players can win before playouts")
+    parser.add_argument("--retry-errors", action="store_true", help="evaluate again games whose result is an error")
+    parser.add_argument("--cache-dir", default=None, help="directory of compiled games, see utils.fromFile")
+    args = parser.parse_args()
+    paths = glob.glob(os.path.join(args.directory, "*.yml"))
+    runPipeline(paths, args.output, defaultStages(args.playouts, args.reject_one_sided), args.workers, args.seed, args.cache_dir, root=args.directory, retryErrors=args.retry_errors)
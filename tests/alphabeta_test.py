@@ -0,0 +1,54 @@
+import os
+import random
+import unittest
+import utils
+from game_elements.player import Player
+from mcts.alphabeta import AlphaBeta
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+def minimax(search, game_state, depth):
+    winner = game_state.winner
+    if winner is not None:
+        return 2000 if winner == Player.P2 else -2000
+    if depth == 0 or not game_state.possibleMoves:
+        return search.evaluate(game_state)
+    values = []
+    for move in game_state.possibleMoves:
+        record = game_state.make(move)
+        values.append(minimax(search, game_state, depth - 1))
+        game_state.unmake(record)
+    return max(values) if game_state.currentPlayer == Player.P2 else min(values)
+
+class AlphaBetaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+
+    def test_matches_minimax(self):
+        random.seed(0)
+        state = self.game.initialState()
+        search = AlphaBeta(self.game, depth=2)
+        for _ in range(3):
+            for _ in range(5):
+                state.make(random.choice(state.possibleMoves))
+            maximizing = state.currentPlayer == Player.P2
+            value, move = search.alphaBeta(state.copy(), maximizing, -5000, 5000, 2)
+            self.assertAlmostEqual(value, minimax(search, state.copy(), 2))
+            self.assertIn((move.origin, move.destination), [(m.origin, m.destination) for m in state.possibleMoves])
+            cached, _ = search.alphaBeta(state.copy(), maximizing, -5000, 5000, 2)
+            self.assertEqual(value, cached)
+
+    def test_find_best_move(self):
+        state = self.game.initialState()
+        nextState = AlphaBeta(self.game, depth=2).findBestMove(state)
+        self.assertEqual(nextState.currentPlayer, Player.P2)
+        self.assertIn(nextState, state.possibleStates)
+
+    def test_node_budget(self):
+        state = self.game.initialState()
+        search = AlphaBeta(self.game, depth=None, nodeLimit=300)
+        nextState = search.findBestMove(state)
+        self.assertIn(nextState, state.possibleStates)
+        self.assertGreaterEqual(search.completedDepth, 1)
+        self.assertLess(search.nodes, 1000)
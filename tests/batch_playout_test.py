@@ -0,0 +1,38 @@
+import os
+import random
+import unittest
+from collections import Counter
+import utils
+from game_definitions import batch_playout
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+@unittest.skipUnless(batch_playout.available(), "requires NumPy")
+class BatchPlayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+        self.engine = batch_playout.BatchPlayout(self.game)
+
+    def test_legal_moves_match_game_state(self):
+        random.seed(0)
+        state = self.game.initialState()
+        board = state.board
+        while not state.finished:
+            legal = self.engine.legalMoves(self.engine.encode(board)[None, :], state.currentPlayer)[0]
+            candidates = self.engine.candidates[state.currentPlayer]
+            found = Counter((candidates["origins"][i], candidates["destinations"][i]) for i in legal.nonzero()[0])
+            expected = Counter((board.index(move.origin), board.index(move.destination)) for move in state.possibleMoves)
+            self.assertEqual(found, expected)
+            state.make(random.choice(state.possibleMoves))
+
+    def test_run(self):
+        results = self.engine.run(20)
+        self.assertEqual(len(results), 20)
+        for winner, turnCount, movedPieces in results:
+            self.assertIsNotNone(winner)
+            self.assertGreater(turnCount, 10)
+            self.assertEqual(movedPieces, {1})
+
+    def test_decode(self):
+        self.assertEqual(self.engine.decode(self.engine.encode(self.game.initialBoard)), self.game.initialBoard)
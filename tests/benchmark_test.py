@@ -0,0 +1,12 @@
+import json
+import unittest
+import benchmark
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_results_are_json(self):
+        results = json.loads(json.dumps(benchmark.runBenchmarks(sample=1, playouts=1, depth=1)))
+        self.assertEqual(len(results["games"]), 2)
+        self.assertIn("breakthrough.yml", results["games"])
+        for key in ["playouts_per_sec", "states_per_sec", "movegen_us", "heuristic_us", "alphabeta_nodes_per_sec"]:
+            self.assertGreater(results["totals"][key], 0)
@@ -0,0 +1,56 @@
+import os
+import random
+import unittest
+import utils
+import game_generator
+from game_definitions.boardGame import GameState
+from game_definitions.bitboard import BitboardState, BitboardMoves, UnsupportedGame
+from game_definitions.move_conditions import MoveCondition, Empty
+from game_elements.player import Player
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+def signature(moves):
+    return [(move.origin, move.destination, move.capture) for move in moves]
+
+class BitboardTest(unittest.TestCase):
+
+    def assertSameMoves(self, game, plies=80):
+        state, bitboardState = GameState(game, game.initialBoard), BitboardState(game, game.initialBoard)
+        records = []
+        for _ in range(plies):
+            if state.finished:
+                break
+            self.assertEqual(signature(state.possibleMoves), signature(bitboardState.possibleMoves))
+            for index in state.board.locations[(~state.currentPlayer).value]:
+                self.assertEqual(signature(state.legalMovesAt(index)), signature(bitboardState.legalMovesAt(index)))
+            if records and random.random() < 0.3:
+                record, bitboardRecord = records.pop()
+                state.unmake(record)
+                bitboardState.unmake(bitboardRecord)
+            else:
+                i = random.randrange(len(state.possibleMoves))
+                records.append((state.make(state.possibleMoves[i]), bitboardState.make(bitboardState.possibleMoves[i])))
+            self.assertEqual(state.board, bitboardState.board)
+
+    def test_breakthrough_moves_match_game_state(self):
+        random.seed(0)
+        self.assertSameMoves(utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml")))
+
+    def test_generated_moves_match_game_state(self):
+        random.seed(1)
+        for _ in range(20):
+            self.assertSameMoves(game_generator.generateGame())
+
+    def test_initial_state_engine(self):
+        game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+        game.engine = "bitboard"
+        state = game.initialState()
+        self.assertIsInstance(state, BitboardState)
+        self.assertIsInstance(state.copy(), BitboardState)
+
+    def test_unsupported_condition(self):
+        game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+        game.piece_types[Player.P1][1].moveset[0].condition = MoveCondition(Empty(), Empty(), True)
+        with self.assertRaises(UnsupportedGame):
+            BitboardMoves(game)
@@ -0,0 +1,64 @@
+import unittest
+from copy import deepcopy
+from game_elements.board import Board
+from game_elements.player import Player
+from game_definitions.vector import Vector
+
+class BoardTest(unittest.TestCase):
+
+    def test_placement(self):
+        board = Board(4, 6, {(0,0): 1, (3,1): 2}, player2Mirrored=True)
+        self.assertEqual(board[Vector(0,0)].piece, 1)
+        self.assertEqual(board[Vector(0,0)].owner, Player.P1)
+        self.assertEqual(board[Vector(3,5)].owner, Player.P2)
+        self.assertEqual(board[Vector(0,4)].piece, 2)
+        self.assertTrue(board[Vector(1,1)].isEmpty())
+        self.assertTrue(board[Vector(-1,9)].isEmpty())
+        self.assertEqual(board.countPieces(), 4)
+
+    def test_move_and_remove(self):
+        board = Board(3, 3, {(0,0): 1})
+        board.movePiece(Vector(0,0), Vector(1,1))
+        self.assertTrue(board[Vector(0,0)].isEmpty())
+        self.assertEqual(board[Vector(1,1)].piece, 1)
+        board.remove(Vector(1,1))
+        board.remove(Vector(7,7))
+        self.assertEqual([square.piece for square in board.iterate()], [1])
+        self.assertEqual([square.coords for square in board.iterate(Player.P2)], [Vector(0,2)])
+
+    def test_copy_is_independent(self):
+        board = Board(3, 5, {(1,0): 1})
+        copied = deepcopy(board)
+        self.assertEqual(board, copied)
+        self.assertEqual(hash(board), hash(copied))
+        copied.remove(Vector(1,0))
+        self.assertNotEqual(board, copied)
+        self.assertEqual(board[Vector(1,0)].piece, 1)
+
+    def test_zobrist_key_is_incremental(self):
+        board = Board(5, 5, {(0,0): 1, (1,0): 2, (2,1): 1})
+        board.movePiece(Vector(0,0), Vector(1,3))
+        board.movePiece(Vector(1,3), Vector(1,4))
+        board.remove(Vector(2,3))
+        board.place(Vector(2,2), 2, Player.P2)
+        rebuilt = Board(5, 5)
+        for square in board.iterate():
+            rebuilt.place(square.coords, square.piece, square.owner)
+        self.assertEqual(board.key, rebuilt.key)
+        self.assertNotEqual(board.key, Board(5, 5, {(0,0): 1, (1,0): 2, (2,1): 1}).key)
+
+    def test_piece_indexes(self):
+        board = Board(5, 5, {(0,0): 1, (1,0): 2, (2,1): 1})
+        copied = deepcopy(board)
+        board.movePiece(Vector(0,0), Vector(2,3))
+        board.movePiece(Vector(1,4), Vector(1,0))
+        board.place(Vector(4,4), 2, Player.P1)
+        for owner in [Player.P1, Player.P2]:
+            indices = [index for index, value in enumerate(board.owners) if value == owner.value]
+            self.assertEqual(board.locations[owner.value], indices)
+            self.assertEqual(board.countPieces(owner), len(indices))
+            for piece in [1, 2]:
+                self.assertEqual(board.countPieces(owner, piece), len([index for index in indices if board.pieces[index] == piece]))
+        self.assertEqual(board.countPieces(), 5)
+        self.assertEqual(copied.countPieces(Player.P2, 2), 1)
+        self.assertEqual(copied.locations[Player.P1.value], [0, 1, 7])
@@ -0,0 +1,41 @@
+import copy
+import glob
+import os
+import unittest
+import yaml
+from generators.duplicates import DuplicateIndex, features
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class DuplicatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.games = []
+        for path in sorted(glob.glob(os.path.join(GAMES_DIR, "generated", "game_2*.yml")))[:40]:
+            with open(path) as gameFile:
+                gameDict = yaml.safe_load(gameFile)
+            if "winConditions" in gameDict:
+                self.games.append(gameDict)
+
+    def test_equivalent_games_have_equal_features(self):
+        game = next(game for game in self.games if len(game["pieces"]) > 1)
+        variant = copy.deepcopy(game)
+        variant["placement"] = " ".join(row[::-1] for row in variant["placement"].split(" "))
+        variant["pieces"] = variant["pieces"][::-1]
+        for pieceDict in variant["pieces"]:
+            definition, = pieceDict.values()
+            definition["moves"] = definition["moves"][::-1] + definition["moves"][:1]
+        ids = { str(i + 1): str(len(game["pieces"]) - i) for i in range(len(game["pieces"])) }
+        variant["pieces"] = [{ ids[pieceId]: definition } for pieceDict in variant["pieces"] for pieceId, definition in pieceDict.items()]
+        variant["placement"] = "".join(ids.get(square, square) for square in variant["placement"])
+        if "EnemyPieceTypeRemoved" in variant["winConditions"]:
+            variant["winConditions"]["EnemyPieceTypeRemoved"] = int(ids[str(variant["winConditions"]["EnemyPieceTypeRemoved"])])
+        self.assertEqual(features(variant), features(game))
+
+    def test_index_finds_only_duplicates(self):
+        index = DuplicateIndex()
+        for game in self.games:
+            self.assertIsNone(index.query(game))
+            index.add(game)
+        for i, game in enumerate(self.games):
+            self.assertEqual(index.query(game), i)
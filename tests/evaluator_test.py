@@ -0,0 +1,31 @@
+import os
+import unittest
+import utils
+import evaluator
+from game_definitions.boardGame import BoardGame
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class EvaluatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gameDict = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml")).toDict()
+
+    def reasons(self):
+        return evaluator.rejectionReasons(BoardGame.fromDict(self.gameDict))
+
+    def test_playable_game_is_accepted(self):
+        self.assertEqual(self.reasons(), [])
+
+    def test_piece_without_moves(self):
+        self.gameDict["pieces"][0]["1"]["moves"] = []
+        self.assertIn("piece type 1 has no moves", self.reasons())
+
+    def test_unreachable_win_condition(self):
+        self.gameDict["pieces"][0]["1"]["moves"] = [{ "hop": "R" }]
+        self.gameDict["winConditions"] = { "piecePlacedAt": { 7: "0" } }
+        self.assertIn("neither player can meet its win condition nor capture enemy pieces", self.reasons())
+
+    def test_condition_met_at_start(self):
+        self.gameDict["winConditions"] = { "EnemyTotalPiecesLeft": 100 }
+        self.assertIn("win condition of P2 is met by the initial placement", self.reasons())
@@ -0,0 +1,39 @@
+import random
+import unittest
+import evolution
+import game_generator
+from game_definitions import moves
+from generators import moveGenerator
+
+class EvolutionTest(unittest.TestCase):
+
+    def test_operators_keep_genomes_valid(self):
+        random.seed(0)
+        genomes = [game_generator.generateGame().toDict() for _ in range(8)]
+        genomes = [genome for genome in genomes if evolution.isValid(genome)]
+        self.assertGreater(len(genomes), 1)
+        for genome in genomes:
+            self.assertTrue(evolution.isValid(evolution.mutate(genome)))
+            self.assertTrue(evolution.isValid(evolution.crossover(genome, random.choice(genomes))))
+
+    def test_mutated_moves_do_not_overlap(self):
+        random.seed(1)
+        genome = game_generator.generateGame().toDict()
+        for _ in range(50):
+            evolution.mutateMoves(genome)
+            for pieceDict in genome["pieces"]:
+                definition, = pieceDict.values()
+                destinations = [moveGenerator.moveDestinations(moves.fromDict(moveDict)) for moveDict in definition["moves"]]
+                self.assertEqual(len(set().union(*destinations)), sum(len(reached) for reached in destinations))
+
+    def test_run_is_reproducible(self):
+        runs = []
+        for callerSeed in range(2):
+            random.seed(callerSeed)
+            search = evolution.Evolution(populationSize=4, elite=1, playouts=2, seed=3)
+            best = search.run(2, verbose=False)
+            self.assertEqual(random.random(), random.Random(callerSeed).random())
+            runs.append((best, [stats["best"] for stats in search.history]))
+            self.assertEqual(len(search.population), 4)
+            self.assertGreaterEqual(search.history[1]["best"], search.history[0]["best"])
+        self.assertEqual(runs[0], runs[1])
@@ -0,0 +1,95 @@
+import os
+import pickle
+import random
+import unittest
+import utils
+from copy import deepcopy
+from game_definitions.boardGame import GameState
+from game_definitions.win_conditions import PieceIsPlacedAt
+from game_elements.player import Player
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class GameStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+
+    def test_make_unmake(self):
+        random.seed(0)
+        state = self.game.initialState()
+        for _ in range(30):
+            before = state.copy()
+            moves = state.possibleMoves
+            for move in moves:
+                record = state.make(move)
+                self.assertNotEqual(state.currentPlayer, before.currentPlayer)
+                state.unmake(record)
+                self.assertEqual(state, before)
+                self.assertEqual(state.round_count, before.round_count)
+                self.assertIs(state.possibleMoves, moves)
+            state.make(random.choice(moves))
+
+    def test_make_matches_apply_move(self):
+        random.seed(1)
+        state = self.game.initialState()
+        for _ in range(30):
+            move = random.choice(state.possibleMoves)
+            applied = state.applyMove(move)
+            state.make(move)
+            self.assertEqual(state, applied)
+
+    def test_key_includes_player(self):
+        state = self.game.initialState()
+        other = state.copy()
+        other.currentPlayer = ~other.currentPlayer
+        self.assertEqual(state.key, state.copy().key)
+        self.assertNotEqual(state.key, other.key)
+        self.assertNotEqual(state, other)
+        self.assertEqual(len({state, state.copy(), other}), 2)
+
+    def test_incremental_moves_match_fresh_generation(self):
+        random.seed(2)
+        state = self.game.initialState()
+        records = []
+        for _ in range(60):
+            if state.finished:
+                break
+            fresh = GameState(state.game, state.board, state.currentPlayer, state.round_count)
+            self.assertEqual([(m.origin, m.destination) for m in state.possibleMoves],
+                             [(m.origin, m.destination) for m in fresh.possibleMoves])
+            if records and random.random() < 0.3:
+                state.unmake(records.pop())
+            else:
+                records.append(state.make(random.choice(state.possibleMoves)))
+
+    def test_pickle(self):
+        state = self.game.initialState()
+        state.make(state.possibleMoves[0])
+        restored = pickle.loads(pickle.dumps(state))
+        self.assertEqual(restored, state)
+        self.assertEqual([(m.origin, m.destination) for m in restored.possibleMoves],
+                         [(m.origin, m.destination) for m in state.possibleMoves])
+
+    def test_possible_states_are_lazy(self):
+        state = self.game.initialState()
+        states = state.possibleStates
+        self.assertEqual(next(states), state.applyMove(state.possibleMoves[0]))
+        self.assertEqual(list(states), [state.applyMove(move) for move in state.possibleMoves[1:]])
+        self.assertEqual(pickle.loads(pickle.dumps(state.possibleMoves)), state.possibleMoves)
+
+    def test_compiled_win_conditions(self):
+        random.seed(3)
+        for fileName in ["breakthrough.yml", "generated/game_1.yml"]:
+            state = utils.fromFile(os.path.join(GAMES_DIR, fileName)).initialState()
+            for _ in range(60):
+                for player in [Player.P1, Player.P2]:
+                    condition = state.game.winConditions[player]
+                    uncompiled = deepcopy(condition)
+                    for placedAt in [uncompiled, getattr(uncompiled, "conditionA", None), getattr(uncompiled, "conditionB", None)]:
+                        if isinstance(placedAt, PieceIsPlacedAt):
+                            placedAt.maskSize = None
+                    self.assertEqual(condition.check(state.board), uncompiled.check(state.board))
+                if state.finished:
+                    break
+                state.make(random.choice(state.possibleMoves))
@@ -0,0 +1,47 @@
+import os
+import random
+import unittest
+import utils
+import evaluator
+from game_elements.player import Player
+from game_definitions.heuristicValueEvaluator import HeuristicCalculator
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class HeuristicCalculatorTest(unittest.TestCase):
+
+    def test_incremental_matches_calculate(self):
+        random.seed(0)
+        for fileName in ["breakthrough.yml", "generated/game_1.yml", "generated/game_12.yml"]:
+            game = utils.fromFile(os.path.join(GAMES_DIR, fileName))
+            calculator = HeuristicCalculator(game)
+            state = game.initialState()
+            evaluation = calculator.incremental(state)
+            records = []
+            for _ in range(40):
+                if state.finished:
+                    break
+                for incremental, scanned in zip(evaluation.calculate(), calculator.calculate(state)):
+                    self.assertAlmostEqual(incremental, scanned)
+                if records and random.random() < 0.3:
+                    record = records.pop()
+                    state.unmake(record)
+                else:
+                    record = state.make(random.choice(state.possibleMoves))
+                    records.append(record)
+                evaluation.update(record)
+
+    def test_move_distances(self):
+        game = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml"))
+        manhattan = HeuristicCalculator(game)
+        moves = HeuristicCalculator(game, moveDistances=True)
+        _, manhattanMaps = manhattan.placedAtConditions[0]
+        _, moveMaps = moves.placedAtConditions[0]
+        self.assertEqual(moveMaps[1], manhattanMaps[1])
+        self.assertEqual(moves.calculate(game.initialState()), manhattan.calculate(game.initialState()))
+        board = game.initialBoard
+        pawn = game.piece_types[Player.P1][1]
+        distances = evaluator.pieceDistances(pawn.moveset, [(0, board.height - 1)], board)
+        self.assertEqual(distances[board.index((0, 0))], board.height - 1)
+        self.assertEqual(distances[board.index((board.width - 1, 0))], board.height - 1)
+        self.assertIsNone(distances[board.index((0, board.height - 1)) - 1])
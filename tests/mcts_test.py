@@ -0,0 +1,122 @@
+import math
+import os
+import random
+import sys
+import unittest
+import utils
+from mcts import mcts
+from mcts.tree import SearchTree
+from mcts.playouts import RandomPlayout, CapturePlayout, EpsilonGreedyPlayout
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class ReferenceNode(mcts.UCTNode):
+    """Node of the object based search SearchTree replaced, kept as a reference for its results"""
+
+    def uctValue(self):
+        if self.number_visits == 0:
+            return sys.maxsize
+        return ((self.total_value * 1.0) / self.number_visits) + (1.41 * math.sqrt(math.log(self.parent.number_visits) / self.number_visits))
+
+    def best_child(self):
+        return max(self.children, key=lambda node: node.uctValue())
+
+    def select_leaf(self):
+        current = self
+        while len(current.children) != 0:
+            current = current.best_child()
+        return current
+
+    def simulateRandomPlayout(self, player):
+        if(self.game_state.winner == ~player):
+            self.parent.total_value = -999999
+            return self.game_state.winner
+        game_state = self.game_state.copy()
+        while not game_state.finished:
+            game_state.make(random.choice(game_state.possibleMoves))
+        return game_state.winner
+
+    def expand_node(self):
+        for state in self.game_state.possibleStates:
+            newNode = ReferenceNode(state, parent=self)
+            self.children.append(newNode)
+
+    def backup(self, winner, player):
+        current = self
+        while current is not None:
+            current.number_visits += 1
+            if winner == player:
+                current.total_value += 1
+            current = current.parent
+
+def uctNodeSearch(state, iterations):
+    rootNode = ReferenceNode(state)
+    for _ in range(iterations):
+        promisingNode = rootNode.select_leaf()
+        if not promisingNode.game_state.finished:
+            promisingNode.expand_node()
+        nodeToExplore = promisingNode
+        if promisingNode.children:
+            nodeToExplore = random.choice(promisingNode.children)
+        nodeToExplore.backup(nodeToExplore.simulateRandomPlayout(state.currentPlayer), state.currentPlayer)
+    return rootNode
+
+class SearchTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = utils.fromFile(os.path.join(GAMES_DIR, "breakthrough.yml")).initialState()
+
+    def test_matches_uct_nodes(self):
+        random.seed(0)
+        rootNode = uctNodeSearch(self.state, 60)
+        random.seed(0)
+        tree = SearchTree(self.state)
+        tree.search(None, 60)
+        self.assertEqual([child.number_visits for child in rootNode.children], [tree.visits[child] for child in tree.children()])
+        self.assertEqual([child.total_value for child in rootNode.children], [tree.values[child] for child in tree.children()])
+        self.assertEqual(tree.state, self.state)
+
+    def test_memory_limit_below_root_children(self):
+        node = mcts.findNextMove(self.state, timeLimit=None, iterations=20, memoryLimit=100)
+        self.assertIn(node.game_state, self.state.possibleStates)
+
+    def test_memory_limit(self):
+        tree = SearchTree(self.state, memoryLimit=100 * SearchTree.NODE_BYTES)
+        self.assertEqual(tree.search(None, 50), 50)
+        self.assertLessEqual(len(tree), 100)
+
+    def test_find_next_move(self):
+        node = mcts.findNextMove(self.state, timeLimit=None, iterations=30)
+        self.assertIn(node.game_state, self.state.possibleStates)
+
+    def test_searcher_reuses_subtree(self):
+        random.seed(1)
+        searcher = mcts.MCTSSearcher(timeLimit=None, iterations=100)
+        state = searcher.findNextMove(self.state).game_state
+        self.assertEqual(searcher.tree.state, state)
+        state = state.applyMove(state.possibleMoves[0])
+        path = searcher.tree.find(state)
+        visits = searcher.tree.visits[path[-1]]
+        self.assertTrue(searcher.advance(state))
+        self.assertEqual(searcher.tree.state, state)
+        self.assertEqual(searcher.tree.visits[0], visits)
+        self.assertEqual(searcher.tree.parent[0], -1)
+
+    def test_playout_policies(self):
+        random.seed(2)
+        game = self.state.game
+        reward = RandomPlayout(game, cutoff=4).play(self.state.copy(), self.state.currentPlayer)
+        self.assertTrue(0 < reward < 1)
+        for policy in [CapturePlayout(), EpsilonGreedyPlayout(game, cutoff=4)]:
+            tree = SearchTree(self.state, policy=policy)
+            self.assertEqual(tree.search(None, 10), 10)
+            self.assertEqual(tree.visits[0], 10)
+        with self.assertRaises(ValueError):
+            RandomPlayout(cutoff=4)
+
+    def test_leaf_parallel_search(self):
+        random.seed(3)
+        node = mcts.findNextMove(self.state, timeLimit=None, iterations=5, workers=2, parallel="leaf")
+        self.assertIn(node.game_state, self.state.possibleStates)
+        searcher = mcts.MCTSSearcher(timeLimit=None, iterations=5, workers=2)
+        self.assertIn(searcher.findNextMove(self.state).game_state, self.state.possibleStates)
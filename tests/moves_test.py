@@ -0,0 +1,48 @@
+import unittest
+from game_elements.board import Board
+from game_definitions.moves import Hop, Leap, Slide
+from game_definitions.vector import Vector
+
+DIRECTIONS = [Vector(x, y) for x in range(-2, 3) for y in range(-2, 3) if (x, y) != (0, 0)]
+
+class MoveTablesTest(unittest.TestCase):
+
+    def boards(self):
+        return [Board(5, 8), Board(8, 3), Board(1, 4)]
+
+    def test_hop_table(self):
+        for board in self.boards():
+            for direction in DIRECTIONS:
+                table = Hop(direction).compile(board.width, board.height)
+                for index in range(board.width * board.height):
+                    destination = board.position(index) + direction
+                    expected = (board.index(destination), destination) if board.contains(destination) else None
+                    self.assertEqual(table[index], expected, (board.width, board.height, direction, index))
+
+    def test_slide_table(self):
+        for board in self.boards():
+            for direction in DIRECTIONS:
+                table = Slide(direction, None).compile(board.width, board.height)
+                for index in range(board.width * board.height):
+                    expected = []
+                    square = board.position(index) + direction
+                    while board.contains(square):
+                        expected.append((board.index(square), square))
+                        square = square + direction
+                    self.assertEqual(table[index], expected, (board.width, board.height, direction, index))
+
+    def test_leap_table(self):
+        for board in self.boards():
+            for direction in DIRECTIONS:
+                table = Leap(direction).compile(board.width, board.height)
+                for index in range(board.width * board.height):
+                    over = board.position(index) + direction
+                    landing = over + direction
+                    expected = (board.index(over), over, board.index(landing), landing) if board.contains(landing) else None
+                    self.assertEqual(table[index], expected, (board.width, board.height, direction, index))
+
+    def test_tables_follow_board_size(self):
+        hop = Hop(Vector(1, 0))
+        self.assertIsNot(hop.compile(5, 8), hop.compile(8, 5))
+        self.assertEqual(hop.tableSize, (8, 5))
+        self.assertIs(hop.compile(5, 8), Hop(Vector(1, 0)).compile(5, 8))
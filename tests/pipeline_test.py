@@ -0,0 +1,54 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import pipeline
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = sorted(glob.glob(os.path.join(GAMES_DIR, "generated", "game_1*.yml")))[:3]
+        self.output = os.path.join(self.directory, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def results(self):
+        with open(self.output) as outputFile:
+            return [json.loads(line) for line in outputFile]
+
+    def test_results_are_written_once(self):
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1), 3)
+        results = self.results()
+        self.assertEqual(sorted(result["game"] for result in results), sorted(os.path.basename(path) for path in self.paths))
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1), 0)
+        self.assertEqual(self.results(), results)
+
+    def test_resume_after_partial_write(self):
+        pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1)
+        results = self.results()
+        with open(self.output, "w") as outputFile:
+            outputFile.write(json.dumps(results[0]) + "\n" + json.dumps(results[1])[:10])
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1), 2)
+        self.assertEqual(sorted(self.results(), key=lambda result: result["game"]), sorted(results, key=lambda result: result["game"]))
+
+    def test_corrupt_line_keeps_later_results(self):
+        pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1)
+        results = self.results()
+        with open(self.output, "w") as outputFile:
+            outputFile.write(json.dumps(results[0]) + "\n{\"game\n" + json.dumps(results[1]) + "\n" + json.dumps(results[2]) + "\n")
+        self.assertEqual(pipeline.completedGames(self.output), { result["game"] for result in results })
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1), 0)
+
+    def test_retry_errors(self):
+        with open(self.output, "w") as outputFile:
+            outputFile.write(json.dumps({ "game": os.path.basename(self.paths[0]), "status": "error", "reason": "MemoryError: " }) + "\n")
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1), 2)
+        self.assertEqual(pipeline.runPipeline(self.paths, self.output, pipeline.defaultStages(2), workers=1, retryErrors=True), 1)
+        self.assertEqual(self.results()[-1]["game"], os.path.basename(self.paths[0]))
+        self.assertNotEqual(self.results()[-1]["status"], "error")
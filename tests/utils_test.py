@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+import unittest
+import utils
+
+GAMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "games")
+
+class UtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cacheDir = os.path.join(self.directory, "cache")
+        self.path = os.path.join(self.directory, "game.yml")
+        shutil.copy(os.path.join(GAMES_DIR, "breakthrough.yml"), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cached_game_matches_parsed(self):
+        parsed = utils.fromFile(self.path)
+        utils.fromFile(self.path, self.cacheDir)
+        self.assertEqual(len(os.listdir(self.cacheDir)), 1)
+        cached = utils.fromFile(self.path, self.cacheDir)
+        self.assertEqual(cached.toDict(), parsed.toDict())
+        self.assertEqual([(m.origin, m.destination) for m in cached.initialState().possibleMoves],
+                         [(m.origin, m.destination) for m in parsed.initialState().possibleMoves])
+
+    def test_changed_file_is_parsed_again(self):
+        utils.fromFile(self.path, self.cacheDir)
+        game = utils.fromFile(self.path)
+        game.isPlayer2mirrored = not game.isPlayer2mirrored
+        utils.toFile(game, self.path)
+        self.assertEqual(utils.fromFile(self.path, self.cacheDir).isPlayer2mirrored, game.isPlayer2mirrored)
+        self.assertEqual(len(os.listdir(self.cacheDir)), 2)
+
+    def test_game_dictionary_is_saved(self):
+        gameDict = utils.fromFile(self.path).toDict()
+        utils.toFile(gameDict, self.path)
+        self.assertEqual(utils.fromFile(self.path).toDict(), gameDict)
@@ -1,11 +1,38 @@
+import hashlib
+import os
+import pickle
 import yaml
 from game_definitions.boardGame import BoardGame
 
-def fromFile(filePath):
-    with open(filePath, "r") as gameStr:
-        game = BoardGame.fromDict(yaml.safe_load(gameStr))
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader) #LibYAML based loader when PyYAML was built with it
+CACHE_VERSION = 1
+
+def fromFile(filePath, cacheDir=None):
+    """Loads game from a YAML file, with cacheDir compiled games are kept there as pickles named after hash of the file's content
+
+    A cached game is used only while the file keeps the same content, changed files are parsed and cached again.
+    """
+    with open(filePath, "rb") as gameFile:
+        content = gameFile.read()
+    if cacheDir is None:
+        return BoardGame.fromDict(yaml.load(content, Loader=SafeLoader))
+    cachePath = os.path.join(cacheDir, "%s.v%d.pickle" % (hashlib.sha256(content).hexdigest(), CACHE_VERSION))
+    try:
+        with open(cachePath, "rb") as cacheFile:
+            return pickle.load(cacheFile)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+    game = BoardGame.fromDict(yaml.load(content, Loader=SafeLoader))
+    game.dependencyMap
+    os.makedirs(cacheDir, exist_ok=True)
+    temporaryPath = "%s.%d.tmp" % (cachePath, os.getpid()) #written aside, so parallel loaders never read a partial file
+    with open(temporaryPath, "wb") as cacheFile:
+        pickle.dump(game, cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporaryPath, cachePath)
     return game
 
 def toFile(boardGame, filePath):
+    """Saves game to a YAML file, the game can also be given as its dictionary (see BoardGame.toDict)"""
+    gameDict = boardGame.toDict() if isinstance(boardGame, BoardGame) else boardGame
     with open(filePath, "w") as gameFile:
-        yaml.safe_dump(boardGame.toDict(), gameFile)
\ No newline at end of file
+        yaml.safe_dump(gameDict, gameFile)